@@ -2,10 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File,
 from fastapi.security import HTTPBearer
 from app.models.document import Document, DocumentUpdate, DocumentStatus
 from app.services.document_processing_service import DocumentProcessingService
+from app.services.ocr_service import PREPROCESS_PROFILES
+from app.services.anonymization_modes import ANONYMIZATION_MODES, analyzer_version, resolve_anonymization_mode
 from app.core.database import db_manager
+from app.services.document_chunk_service import copy_document_chunks
+from app.services.search_index_service import document_sharee_ids, invalidate_document_search_indexes, invalidate_search_indexes
 from app.core.config import settings
 from app.api.auth.auth import get_current_user_id
 import aiofiles
+import hashlib
 import os
 import uuid
 from typing import List, Optional
@@ -23,6 +28,34 @@ def ensure_uuid_string(value):
     return value
 
 
+# Processing results copied from an already processed upload with identical bytes
+DEDUP_COPY_FIELDS = ["extracted_text", "anonymized_text", "vector_embedding", "tags", "document_type", "metadata",
+                     "pii_spans", "analyzer_version"]
+
+
+def _find_processed_duplicate(supabase, owner_id: str, content_hash: str,
+                              anonymization_mode: str) -> Optional[dict]:
+    """A completed document of the same owner with identical bytes.
+
+    Scoped to the owner: matching other tenants' uploads would reveal that
+    someone else holds the same file and copy their results across. Only
+    results of the current analyzer version are reused; older ones would
+    carry spans the current recognizers no longer agree with.
+    """
+    try:
+        result = supabase.table("documents").select(
+            ",".join(["id"] + DEDUP_COPY_FIELDS)
+        ).eq("owner_id", owner_id).eq("content_hash", content_hash).eq(
+            "status", DocumentStatus.COMPLETED.value
+        ).eq("metadata->>anonymization_mode", anonymization_mode).eq(
+            "analyzer_version", analyzer_version(anonymization_mode)
+        ).limit(1).execute()
+        return result.data[0] if result.data else None
+    except Exception as e:
+        logger.error(f"Duplicate lookup failed: {e}")
+        return None
+
+
 router = APIRouter(prefix="/documents", tags=["documents"])
 security = HTTPBearer()
 processing_service = DocumentProcessingService()
@@ -34,6 +67,8 @@ async def upload_document(
         title: str = Form(...),
         description: Optional[str] = Form(None),
         tags: Optional[str] = Form("[]"),
+        ocr_profile: Optional[str] = Form(None),
+        anonymization_mode: Optional[str] = Form(None),
         current_user_id: str = Depends(get_current_user_id)
 ):
     try:
@@ -43,6 +78,19 @@ async def upload_document(
                 detail="Only PDF files are supported"
             )
 
+        if ocr_profile is not None and ocr_profile not in ("auto",) + PREPROCESS_PROFILES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid OCR profile: {ocr_profile}"
+            )
+
+        if anonymization_mode is not None and anonymization_mode not in ANONYMIZATION_MODES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid anonymization mode: {anonymization_mode}"
+            )
+        anonymization_mode = resolve_anonymization_mode(anonymization_mode, ensure_uuid_string(current_user_id))
+
         if file.size > settings.max_file_size:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -59,6 +107,8 @@ async def upload_document(
             content = await file.read()
             await f.write(content)
 
+        content_hash = hashlib.sha256(content).hexdigest()
+
         document_id = str(uuid.uuid4())
         document_data = {
             "id": document_id,
@@ -69,12 +119,26 @@ async def upload_document(
             "file_path": file_path,
             "file_size": len(content),
             "original_filename": file.filename,
+            "content_hash": content_hash,
             "status": DocumentStatus.PENDING.value,
             "created_at": datetime.utcnow().isoformat(),
             "updated_at": datetime.utcnow().isoformat()
         }
 
         supabase = db_manager.get_supabase()
+
+        duplicate = _find_processed_duplicate(
+            supabase, ensure_uuid_string(current_user_id), content_hash, anonymization_mode
+        )
+        if duplicate:
+            logger.info(f"Upload matches processed document {duplicate['id']}, reusing its results")
+            document_data.update({field: duplicate.get(field) for field in DEDUP_COPY_FIELDS})
+            document_data["metadata"] = {
+                **(duplicate.get("metadata") or {}),
+                "deduplicated_from": ensure_uuid_string(duplicate["id"])
+            }
+            document_data["status"] = DocumentStatus.COMPLETED.value
+
         result = supabase.table("documents").insert(document_data).execute()
 
         if not result.data:
@@ -83,7 +147,18 @@ async def upload_document(
                 detail="Failed to save document record"
             )
 
-        task_id = processing_service.process_document_async(file_path, document_id)
+        if duplicate:
+            try:
+                copy_document_chunks(supabase, duplicate["id"], document_id)
+            except Exception as e:
+                # The document stays searchable by its document embedding
+                logger.warning(f"Failed to copy chunks from {duplicate['id']} to {document_id}: {e}")
+            invalidate_search_indexes([current_user_id])
+            return Document(**result.data[0])
+
+        task_id = processing_service.process_document_async(
+            file_path, document_id, ocr_profile, anonymization_mode
+        )
 
         supabase.table("documents").update({
             "processing_task_id": task_id,
@@ -225,6 +300,8 @@ async def update_document(
                 detail="Failed to update document"
             )
 
+        invalidate_document_search_indexes(supabase, document_id, document_owner_id)
+
         updated_document = result.data[0]
         return Document(**updated_document)
 
@@ -269,7 +346,11 @@ async def delete_document(
         if os.path.exists(document["file_path"]):
             os.remove(document["file_path"])
 
+        # Sharees are looked up before the delete cascades their share rows away,
+        # and versions are bumped after it so no rebuild can still see the document
+        sharee_ids = document_sharee_ids(supabase, document_id)
         supabase.table("documents").delete().eq("id", document_id).execute()
+        invalidate_search_indexes([document_owner_id, *sharee_ids])
 
         return {"message": "Document deleted successfully"}
 
@@ -389,6 +470,8 @@ async def share_document(
                 detail="Failed to share document"
             )
 
+        invalidate_search_indexes([shared_with_user["id"]])
+
         return {"message": "Document shared successfully"}
 
     except HTTPException:
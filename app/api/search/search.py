@@ -1,14 +1,20 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.models.document import DocumentSearchResult
 from app.services.document_processing_service import DocumentProcessingService
 from app.core.database import db_manager
+from app.core.config import settings
+from app.services.search_index_service import search_index_cache
 from app.api.auth.auth import get_current_user_id
 from typing import List, Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+QA_CHUNK_COUNT = 5
+# Keeps the chunk over-fetch (5 per document) within pgvector's hnsw.ef_search cap of 1000
+MAX_SEARCH_LIMIT = 100
+
 router = APIRouter(prefix="/search", tags=["search"])
 security = HTTPBearer()
 processing_service = DocumentProcessingService()
@@ -17,22 +23,12 @@ processing_service = DocumentProcessingService()
 @router.post("/query")
 async def search_documents(
         query: str,
-        limit: int = 10,
+        limit: int = Query(10, ge=1, le=MAX_SEARCH_LIMIT),
         threshold: float = 0.7,
+        ef_search: Optional[int] = Query(None, ge=1, le=1000, description="HNSW candidate list size; higher is slower with better recall. Used as given; below 5 x limit the index may return too few documents and the search is redone exactly"),
         current_user_id: str = Depends(get_current_user_id)
 ):
     try:
-        supabase = db_manager.get_supabase()
-
-        accessible_documents = await _get_accessible_documents(current_user_id)
-
-        if not accessible_documents:
-            return {
-                "query": query,
-                "results": [],
-                "total_found": 0
-            }
-
         query_embedding = processing_service.create_embeddings_only(query)
 
         if not query_embedding:
@@ -41,33 +37,9 @@ async def search_documents(
                 detail="Failed to process query"
             )
 
-        similar_docs = []
-        for doc in accessible_documents:
-            if doc.get("vector_embedding"):
-                similarity = processing_service.embedding_service.calculate_similarity(
-                    query_embedding, doc["vector_embedding"]
-                )
-
-                if similarity >= threshold:
-                    similar_docs.append({
-                        "document": doc,
-                        "similarity_score": similarity
-                    })
-
-        similar_docs.sort(key=lambda x: x["similarity_score"], reverse=True)
-        results = similar_docs[:limit]
-
-        formatted_results = []
-        for result in results:
-            doc = result["document"]
-            formatted_results.append({
-                "document_id": doc["id"],
-                "title": doc["title"],
-                "description": doc["description"],
-                "similarity_score": result["similarity_score"],
-                "tags": doc.get("tags", []),
-                "created_at": doc["created_at"]
-            })
+        matches = _match_documents(query_embedding, current_user_id, limit, threshold=threshold,
+                                   ef_search=ef_search)
+        formatted_results = [_format_match(match) for match in matches]
 
         return {
             "query": query,
@@ -89,28 +61,11 @@ async def search_documents(
 async def semantic_search(
         query: str,
         document_ids: Optional[List[str]] = None,
-        limit: int = 10,
+        limit: int = Query(10, ge=1, le=MAX_SEARCH_LIMIT),
+        ef_search: Optional[int] = Query(None, ge=1, le=1000, description="HNSW candidate list size; higher is slower with better recall. Used as given; below 5 x limit the index may return too few documents and the search is redone exactly"),
         current_user_id: str = Depends(get_current_user_id)
 ):
     try:
-        supabase = db_manager.get_supabase()
-
-        if document_ids:
-            accessible_docs = []
-            for doc_id in document_ids:
-                doc = await _get_document_if_accessible(doc_id, current_user_id)
-                if doc:
-                    accessible_docs.append(doc)
-        else:
-            accessible_docs = await _get_accessible_documents(current_user_id)
-
-        if not accessible_docs:
-            return {
-                "query": query,
-                "results": [],
-                "total_found": 0
-            }
-
         query_embedding = processing_service.create_embeddings_only(query)
 
         if not query_embedding:
@@ -119,24 +74,9 @@ async def semantic_search(
                 detail="Failed to process query"
             )
 
-        results = []
-        for doc in accessible_docs:
-            if doc.get("vector_embedding"):
-                similarity = processing_service.calculate_similarity(
-                    query_embedding, doc["vector_embedding"]
-                )
-
-                results.append({
-                    "document_id": doc["id"],
-                    "title": doc["title"],
-                    "description": doc["description"],
-                    "similarity_score": similarity,
-                    "tags": doc.get("tags", []),
-                    "created_at": doc["created_at"]
-                })
-
-        results.sort(key=lambda x: x["similarity_score"], reverse=True)
-        results = results[:limit]
+        matches = _match_documents(query_embedding, current_user_id, limit, document_ids=document_ids,
+                                   ef_search=ef_search)
+        results = [_format_match(match) for match in matches]
 
         return {
             "query": query,
@@ -161,19 +101,6 @@ async def question_answering(
         current_user_id: str = Depends(get_current_user_id)
 ):
     try:
-        accessible_docs = []
-        for doc_id in document_ids:
-
-            doc = await _get_document_if_accessible(doc_id, current_user_id)
-            if doc:
-                accessible_docs.append(doc)
-
-        if not accessible_docs:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No accessible documents found"
-            )
-
         question_embedding = processing_service.create_embeddings_only(question)
 
         if not question_embedding:
@@ -182,21 +109,18 @@ async def question_answering(
                 detail="Failed to process question"
             )
 
-        relevant_docs = []
-        for doc in accessible_docs:
-            if doc.get("vector_embedding"):
-                similarity = processing_service.embedding_service.calculate_similarity(
-                    question_embedding, doc["vector_embedding"]
-                )
-
-                relevant_docs.append({
-                    "document": doc,
-                    "similarity_score": similarity
-                })
-
-        relevant_docs.sort(key=lambda x: x["similarity_score"], reverse=True)
+        # Answer from the passages that matched; documents processed before
+        # chunking have no chunks and fall back to their opening text.
+        chunks = _match_chunks(question_embedding, current_user_id, QA_CHUNK_COUNT, document_ids=document_ids)
+        top_docs = _group_chunks(chunks) if chunks else _top_documents_with_text(
+            question_embedding, current_user_id, document_ids
+        )
 
-        top_docs = relevant_docs[:3]
+        if not top_docs:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No accessible documents found"
+            )
 
         answer = _generate_answer_from_documents(question, top_docs)
 
@@ -266,67 +190,104 @@ async def get_search_suggestions(
         }
 
 
-async def _get_accessible_documents(user_id: str) -> List[Dict[str, Any]]:
-    try:
-        supabase = db_manager.get_supabase()
-
-        owned_result = supabase.table("documents").select("*").eq("owner_id", user_id).execute()
-        owned_docs = owned_result.data or []
-
-        shared_result = supabase.table("document_shares").select("document_id").eq("shared_with_user_id",
-                                                                                   user_id).execute()
-        shared_doc_ids = [share["document_id"] for share in shared_result.data or []]
-
-        shared_docs = []
-        if shared_doc_ids:
-            shared_result = supabase.table("documents").select("*").in_("id", shared_doc_ids).execute()
-            shared_docs = shared_result.data or []
+def _match_documents(query_embedding: List[float], user_id: str, limit: int,
+                     threshold: Optional[float] = None,
+                     document_ids: Optional[List[str]] = None,
+                     ef_search: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Top-k accessible documents by cosine similarity, ranked inside Postgres.
+
+    A document scores as its best vector: the document embedding or any of its
+    chunk embeddings. Access control, the vector index scans and the top-k cut
+    all happen in the match_accessible_documents SQL function; rows carry ids, titles and scores
+    plus light metadata, never text or embeddings. With the search index cache
+    enabled, unfiltered searches are answered from the user's in-memory index,
+    unless the request tunes the database index with ef_search.
+    """
+    if settings.search_index_cache_enabled and not (document_ids or ef_search):
+        matches = search_index_cache.search(user_id, query_embedding, limit, threshold)
+        if matches is not None:
+            return matches
+
+    supabase = db_manager.get_supabase()
+    result = supabase.rpc("match_accessible_documents", {
+        "query_embedding": query_embedding,
+        "user_uuid": str(user_id),
+        "match_count": limit,
+        "match_threshold": threshold,
+        "filter_document_ids": document_ids,
+        "ef_search": ef_search or settings.vector_search_ef_search,
+        "probes": settings.vector_search_probes
+    }).execute()
+    return result.data or []
+
+
+def _match_chunks(query_embedding: List[float], user_id: str, limit: int,
+                  document_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """Top-k accessible chunks with their anonymized text, ranked by match_accessible_chunks."""
+    supabase = db_manager.get_supabase()
+    result = supabase.rpc("match_accessible_chunks", {
+        "query_embedding": query_embedding,
+        "user_uuid": str(user_id),
+        "match_count": limit,
+        "filter_document_ids": document_ids,
+        "ef_search": settings.vector_search_ef_search,
+        "probes": settings.vector_search_probes
+    }).execute()
+    return result.data or []
+
+
+def _group_chunks(chunks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """One entry per document, best match first, holding its matched chunks in score order."""
+    top_docs = {}
+    for chunk in chunks:
+        document_id = str(chunk["document_id"])
+        if document_id not in top_docs:
+            top_docs[document_id] = {
+                "document": {"id": chunk["document_id"], "title": chunk["title"], "chunks": []},
+                "similarity_score": chunk["similarity"]
+            }
+        top_docs[document_id]["document"]["chunks"].append(chunk["content"])
 
-        all_docs = owned_docs + shared_docs
-        accessible_docs = [doc for doc in all_docs if doc.get("status") == "completed"]
+    for doc_info in top_docs.values():
+        doc_info["document"]["anonymized_text"] = " ".join(doc_info["document"].pop("chunks"))
+    return list(top_docs.values())
 
-        return accessible_docs
 
-    except Exception as e:
-        logger.error(f"Failed to get accessible documents: {e}")
+def _top_documents_with_text(query_embedding: List[float], user_id: str,
+                             document_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    matches = _match_documents(query_embedding, user_id, 3, document_ids=document_ids)
+    if not matches:
         return []
 
-
-async def _get_document_if_accessible(doc_id: str, user_id: str) -> Optional[Dict[str, Any]]:
-    try:
-        supabase = db_manager.get_supabase()
-
-        result = supabase.table("documents").select("*").eq("id", doc_id).execute()
-        if result:
-            t = result.data[0]
-            print(user_id)
-            print(type(user_id))
-            print(t['owner_id'] == user_id)
-            print(t['status'] == 'completed')
-            print(result.data[0])
-        else:
-            print('*********************************************************************')
-
-        if not result.data:
-            return None
-
-        document = result.data[0]
-
-        if str(document["owner_id"]) == str(user_id):
-            if document.get("status") == "completed":
-                return document
-
-        share_result = supabase.table("document_shares").select("*").eq("document_id", doc_id).eq("shared_with_user_id",
-                                                                                                  user_id).execute()
-
-        if share_result.data:
-            return document if document.get("status") == "completed" else None
-
-        return None
-
-    except Exception as e:
-        logger.error(f"Failed to check document access: {e}")
-        return None
+    # Only the top matches' text is fetched, and only the anonymized version
+    supabase = db_manager.get_supabase()
+    text_result = supabase.table("documents").select("id, anonymized_text").in_(
+        "id", [match["id"] for match in matches]
+    ).execute()
+    texts = {str(row["id"]): row.get("anonymized_text") for row in text_result.data or []}
+
+    return [
+        {
+            "document": {
+                "id": match["id"],
+                "title": match["title"],
+                "anonymized_text": texts.get(str(match["id"]))
+            },
+            "similarity_score": match["similarity"]
+        }
+        for match in matches
+    ]
+
+
+def _format_match(match: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "document_id": match["id"],
+        "title": match["title"],
+        "description": match.get("description"),
+        "similarity_score": match["similarity"],
+        "tags": match.get("tags") or [],
+        "created_at": match.get("created_at")
+    }
 
 
 def _generate_answer_from_documents(question: str, relevant_docs: List[Dict[str, Any]]) -> str:
@@ -1,11 +1,20 @@
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from app.core.config import settings
 from app.services.document_processing_service import DocumentProcessingService
+from app.services.analysis_cache_service import analysis_cache
+from app.services.document_chunk_service import replace_document_chunks
+from app.services.model_registry import model_registry
+from app.services.search_index_service import invalidate_document_search_indexes
+from app.services.status_service import WorkerHeartbeat
 from app.core.database import db_manager
 from app.models.document import DocumentStatus
+import gc
 import logging
 from datetime import datetime
+from typing import List, Optional
 from app.utils.redis_client import get_redis_client
+from app.utils.process_memory import get_memory_breakdown
 
 redis_client = get_redis_client()
 redis_client.set("mykey", "myvalue")
@@ -35,11 +44,59 @@ celery_app.conf.update(
     task_soft_time_limit=25 * 60,  # 25 minutes
     worker_prefetch_multiplier=1,
     worker_max_tasks_per_child=1000,
+    worker_concurrency=settings.worker_concurrency,
 )
 
+_processing_service = None
+
+
+def get_processing_service() -> DocumentProcessingService:
+    """Processing service shared by every task in this worker process."""
+    global _processing_service
+    if _processing_service is None:
+        _processing_service = DocumentProcessingService()
+    return _processing_service
+
+
+def get_ocr_stats() -> dict:
+    """OCR counters of this process, without creating the processing service."""
+    if _processing_service is None:
+        return {}
+    return _processing_service.ocr_service.get_stats()
+
+
+@worker_init.connect
+def preload_models_in_parent(**kwargs):
+    """Load models in the prefork parent so every child shares them copy-on-write.
+
+    gc.freeze() keeps the collector from writing to the loaded objects' headers,
+    which would copy their pages into each child; that alone keeps fork
+    copy-on-write sharing intact. Moving tensors to shared memory is opt-in,
+    because it needs a /dev/shm large enough for every model. Children forked
+    later, e.g. after max_tasks_per_child, inherit the models without loading
+    them again.
+    """
+    if not settings.worker_preload_in_parent:
+        return
+    model_registry.preload_for_role("worker")
+    if settings.worker_share_tensor_memory:
+        model_registry.share_memory()
+    gc.freeze()
+    logger.info(f"Worker models loaded in parent process: {model_registry.report()}")
+
+
+@worker_process_init.connect
+def preload_models(**kwargs):
+    """Load models once when a worker process starts, before it accepts tasks"""
+    # No-op for models already inherited from the parent
+    model_registry.preload_for_role("worker")
+    logger.info(f"Worker models loaded: {model_registry.report()}")
+    WorkerHeartbeat(ocr_stats=get_ocr_stats).start()
+
 
 @celery_app.task(bind=True)
-def process_document_task(self, file_path: str, document_id: str):
+def process_document_task(self, file_path: str, document_id: str, ocr_profile: Optional[str] = None,
+                          anonymization_mode: Optional[str] = None):
     """Process document asynchronously"""
     try:
         logger.info(f"Starting document processing task for document {document_id}")
@@ -50,8 +107,7 @@ def process_document_task(self, file_path: str, document_id: str):
             meta={"current": 0, "total": 100, "status": "Initializing processing"}
         )
 
-        # Initialize processing service
-        processing_service = DocumentProcessingService()
+        processing_service = get_processing_service()
 
         # Update progress
         self.update_state(
@@ -60,33 +116,53 @@ def process_document_task(self, file_path: str, document_id: str):
         )
 
         # Process document
-        result = processing_service.process_document(file_path, document_id)
+        result = processing_service.process_document(file_path, document_id, ocr_profile, anonymization_mode)
+
+        if result["processing_status"] == "completed" and result.get("analyzer_version") is None:
+            # Never store unredacted text as the anonymized rendering
+            result = {
+                "processing_status": "failed",
+                "error_message": "PII analysis failed",
+                "processed_at": result["processed_at"]
+            }
 
         if result["processing_status"] == "completed":
             # Update document in database
             supabase = db_manager.get_supabase()
 
+            # Chunks go in first, so a document is never completed without them
+            chunks = result.pop("chunks")
+            replace_document_chunks(supabase, document_id, chunks)
+
             update_data = {
                 "status": DocumentStatus.COMPLETED.value,
+                "document_type": result["document_type"],
                 "extracted_text": result["extracted_text"],
                 "anonymized_text": result["anonymized_text"],
                 "vector_embedding": result["embedding"],
                 "tags": result["suggested_tags"],
+                "pii_spans": result["pii_spans"],
+                "analyzer_version": result["analyzer_version"],
                 "metadata": {
                     "document_type": result["document_type"],
+                    "pages": result["pages"],
                     "pii_summary": result["pii_summary"],
+                    "is_sensitive": result["is_sensitive"],
+                    "anonymization_mode": result["anonymization_mode"],
                     "processed_at": result["processed_at"]
                 },
                 "updated_at": datetime.utcnow().isoformat()
             }
 
             supabase.table("documents").update(update_data).eq("id", document_id).execute()
+            invalidate_document_search_indexes(supabase, document_id)
 
             logger.info(f"Document processing completed successfully for {document_id}")
 
             return {
                 "status": "completed",
                 "document_id": document_id,
+                "chunks": len(chunks),
                 "result": result
             }
         else:
@@ -134,24 +210,40 @@ def process_document_task(self, file_path: str, document_id: str):
 
 
 @celery_app.task(bind=True)
-def anonymize_text_task(self, text: str, document_id: str):
+def anonymize_text_task(self, text: str, document_id: str, anonymization_mode: Optional[str] = None):
     """Anonymize text asynchronously"""
     try:
         logger.info(f"Starting text anonymization task for document {document_id}")
 
-        processing_service = DocumentProcessingService()
-        result = processing_service.anonymize_text_only(text)
+        processing_service = get_processing_service()
+        result = processing_service.anonymize_text_only(text, anonymization_mode)
+        if not result["success"]:
+            # Keep whatever redacted text the document already has
+            logger.error(f"Text anonymization failed for {document_id}: {result.get('error')}")
+            return {
+                "status": "failed",
+                "document_id": document_id,
+                "error": result.get("error", "Anonymization failed")
+            }
 
-        # Update document with anonymized text
+        # Chunks hold anonymized text, so they must follow the new rendering
         supabase = db_manager.get_supabase()
+        replace_document_chunks(
+            supabase, document_id, processing_service.create_chunk_embeddings_only(result["anonymized_text"])
+        )
+
+        # Update document with anonymized text
         supabase.table("documents").update({
             "anonymized_text": result["anonymized_text"],
+            "pii_spans": result["pii_spans"],
+            "analyzer_version": result["analyzer_version"],
             "metadata": {
                 "pii_entities_found": result["entities_found"],
                 "pii_entities": result["pii_entities"]
             },
             "updated_at": datetime.utcnow().isoformat()
         }).eq("id", document_id).execute()
+        invalidate_document_search_indexes(supabase, document_id)
 
         logger.info(f"Text anonymization completed for {document_id}")
 
@@ -170,13 +262,172 @@ def anonymize_text_task(self, text: str, document_id: str):
         }
 
 
+@celery_app.task(bind=True)
+def anonymize_batch_task(self, document_ids: List[str], batch_size: Optional[int] = None,
+                         n_process: Optional[int] = None, anonymization_mode: Optional[str] = None):
+    """Re-anonymize many documents in one pass through spaCy's nlp.pipe"""
+    try:
+        logger.info(f"Starting batch anonymization for {len(document_ids)} documents")
+
+        supabase = db_manager.get_supabase()
+        documents = supabase.table("documents").select(
+            "id, extracted_text, metadata"
+        ).in_("id", document_ids).execute().data or []
+        documents = [doc for doc in documents if doc.get("extracted_text")]
+
+        processing_service = get_processing_service()
+        anonymization_service = processing_service.get_anonymization_service(anonymization_mode)
+        results = anonymization_service.anonymize_batch(
+            [doc["extracted_text"] for doc in documents],
+            batch_size=batch_size,
+            n_process=n_process
+        )
+
+        failed = 0
+        for doc, result in zip(documents, results):
+            if result["analyzer_version"] is None:
+                # Analysis failed; the result holds raw text, so leave the document as it is
+                logger.error(f"Batch anonymization failed for document {doc['id']}")
+                failed += 1
+                continue
+            metadata = dict(doc.get("metadata") or {})
+            metadata.update({
+                "pii_entities_found": result["entities_found"],
+                "pii_entities": result["pii_entities"],
+                "pii_summary": result["pii_summary"],
+                "is_sensitive": result["is_sensitive"],
+                "anonymization_mode": anonymization_service.mode
+            })
+            replace_document_chunks(
+                supabase, doc["id"], processing_service.create_chunk_embeddings_only(result["anonymized_text"])
+            )
+            supabase.table("documents").update({
+                "anonymized_text": result["anonymized_text"],
+                "pii_spans": result["pii_spans"],
+                "analyzer_version": result["analyzer_version"],
+                "metadata": metadata,
+                "updated_at": datetime.utcnow().isoformat()
+            }).eq("id", doc["id"]).execute()
+            invalidate_document_search_indexes(supabase, doc["id"])
+
+        logger.info(f"Batch anonymization completed for {len(documents) - failed} documents, {failed} failed")
+
+        return {
+            "status": "completed",
+            "documents_processed": len(documents) - failed,
+            "documents_failed": failed,
+            "documents_skipped": len(document_ids) - len(documents)
+        }
+
+    except Exception as e:
+        logger.error(f"Batch anonymization failed: {e}")
+        return {
+            "status": "failed",
+            "error": str(e)
+        }
+
+
+@celery_app.task(bind=True)
+def reanonymize_documents_task(self, document_ids: Optional[List[str]] = None, page_size: int = 100):
+    """Re-render anonymized text after operator or disabled entity changes.
+
+    Documents whose stored spans came from the current analyzer version are
+    rebuilt from those spans with no analysis; the rest are re-analyzed from
+    their extracted text. OCR never runs again.
+    """
+    try:
+        supabase = db_manager.get_supabase()
+        processing_service = get_processing_service()
+        counts = {"from_spans": 0, "reanalyzed": 0, "unchanged": 0, "failed": 0}
+
+        offset = 0
+        while True:
+            query = supabase.table("documents").select(
+                "id, extracted_text, anonymized_text, pii_spans, analyzer_version, metadata"
+            ).eq("status", DocumentStatus.COMPLETED.value)
+            if document_ids:
+                query = query.in_("id", document_ids)
+            documents = query.order("id").range(offset, offset + page_size - 1).execute().data or []
+
+            stale = {}
+            for doc in documents:
+                if not doc.get("extracted_text"):
+                    continue
+                mode = (doc.get("metadata") or {}).get("anonymization_mode") or settings.anonymization_mode
+                anonymization_service = processing_service.get_anonymization_service(mode)
+                if doc.get("analyzer_version") == anonymization_service.analyzer_version and doc.get("pii_spans") is not None:
+                    result = anonymization_service.anonymize_from_spans(doc["extracted_text"], doc["pii_spans"])
+                    counts[_save_reanonymized(supabase, processing_service, doc, result, "from_spans")] += 1
+                else:
+                    stale.setdefault(mode, []).append(doc)
+
+            for mode, docs in stale.items():
+                anonymization_service = processing_service.get_anonymization_service(mode)
+                results = anonymization_service.anonymize_batch([doc["extracted_text"] for doc in docs])
+                for doc, result in zip(docs, results):
+                    counts[_save_reanonymized(supabase, processing_service, doc, result, "reanalyzed")] += 1
+
+            if len(documents) < page_size:
+                break
+            offset += page_size
+
+        logger.info(f"Re-anonymization completed: {counts}")
+        return {"status": "completed", **counts}
+
+    except Exception as e:
+        logger.error(f"Re-anonymization failed: {e}")
+        return {
+            "status": "failed",
+            "error": str(e)
+        }
+
+
+def _save_reanonymized(supabase, processing_service: DocumentProcessingService,
+                       doc: dict, result: dict, method: str) -> str:
+    """Write a re-anonymization result; embeddings and chunks are refreshed only if the text changed."""
+    if result["analyzer_version"] is None:
+        # Analysis failed and the result carries the unredacted text; keep the old one
+        logger.error(f"Re-anonymization failed for {doc['id']}, keeping its current anonymized text")
+        return "failed"
+
+    text_changed = result["anonymized_text"] != doc.get("anonymized_text")
+    if not text_changed and doc.get("analyzer_version") == result["analyzer_version"]:
+        return "unchanged"
+
+    metadata = dict(doc.get("metadata") or {})
+    metadata.update({
+        "pii_summary": result["pii_summary"],
+        "is_sensitive": result["is_sensitive"],
+        "reanonymized_at": datetime.utcnow().isoformat()
+    })
+    update_data = {
+        "anonymized_text": result["anonymized_text"],
+        "pii_spans": result["pii_spans"],
+        "analyzer_version": result["analyzer_version"],
+        "metadata": metadata,
+        "updated_at": datetime.utcnow().isoformat()
+    }
+    if text_changed:
+        embedding = processing_service.create_embeddings_only(result["anonymized_text"])
+        if embedding is not None:
+            update_data["vector_embedding"] = embedding
+        replace_document_chunks(
+            supabase, doc["id"], processing_service.create_chunk_embeddings_only(result["anonymized_text"])
+        )
+
+    supabase.table("documents").update(update_data).eq("id", doc["id"]).execute()
+    if text_changed:
+        invalidate_document_search_indexes(supabase, doc["id"])
+    return method
+
+
 @celery_app.task(bind=True)
 def create_embeddings_task(self, text: str, document_id: str):
     """Create embeddings asynchronously"""
     try:
         logger.info(f"Starting embedding creation task for document {document_id}")
 
-        processing_service = DocumentProcessingService()
+        processing_service = get_processing_service()
         embedding = processing_service.create_embeddings_only(text)
 
         if embedding:
@@ -186,6 +437,7 @@ def create_embeddings_task(self, text: str, document_id: str):
                 "vector_embedding": embedding,
                 "updated_at": datetime.utcnow().isoformat()
             }).eq("id", document_id).execute()
+            invalidate_document_search_indexes(supabase, document_id)
 
             logger.info(f"Embedding creation completed for {document_id}")
 
@@ -217,7 +469,7 @@ def suggest_tags_task(self, text: str, document_id: str):
     try:
         logger.info(f"Starting tag suggestion task for document {document_id}")
 
-        processing_service = DocumentProcessingService()
+        processing_service = get_processing_service()
         tags = processing_service.suggest_tags_only(text)
 
         # Update document with suggested tags
@@ -244,6 +496,19 @@ def suggest_tags_task(self, text: str, document_id: str):
         }
 
 
+@celery_app.task(bind=True)
+def model_report_task(self):
+    """Report model load times and memory for the worker process that runs it"""
+    return {
+        "status": "completed",
+        "hostname": self.request.hostname,
+        "models": model_registry.report(),
+        "memory": get_memory_breakdown(),
+        "analysis_cache": analysis_cache.get_stats(),
+        "ocr": get_ocr_stats()
+    }
+
+
 @celery_app.task(bind=True)
 def test_simple_task(self, message: str):
     """Simple test task to verify Celery is working"""
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field, validator, field_validator
-from typing import Optional, List
+from typing import Optional, List, Dict
 import os
 
 
@@ -22,12 +22,17 @@ class Settings(BaseSettings):
 
     celery_broker_url: str = Field(default="redis://localhost:6379/0", description="Celery broker URL")
     celery_result_backend: str = Field(default="redis://localhost:6379/0", description="Celery result backend URL")
+    worker_concurrency: int = Field(default=2, ge=1, description="Celery prefork child processes per worker")
+    worker_preload_in_parent: bool = Field(default=False, description="Load worker models before forking so prefork children share them")
+    worker_share_tensor_memory: bool = Field(default=False, description="Move preloaded model tensors to /dev/shm; it must hold every model (Docker's default is 64 MB, raise it with --shm-size)")
+    worker_heartbeat_interval: int = Field(default=15, ge=1, description="Seconds between worker heartbeats")
+    status_refresh_interval: int = Field(default=10, ge=1, description="Seconds between background /status refreshes")
 
     upload_dir: str = Field(default="uploads", description="File upload directory")
     max_file_size: int = Field(default=50 * 1024 * 1024, ge=1024, description="Maximum file size in bytes")
     allowed_extensions: List[str]
 
-    @field_validator("allowed_extensions", mode="before")
+    @field_validator("allowed_extensions", "anonymization_disabled_entities", mode="before")
     def split_extensions(cls, v):
         if isinstance(v, str):
             return [item.strip() for item in v.split(",") if item.strip()]
@@ -37,9 +42,55 @@ class Settings(BaseSettings):
     zero_shot_model: str = Field(default="facebook/bart-large-mnli", description="Zero-shot classification model")
 
     presidio_language: str = Field(default="en", description="Presidio language")
+    presidio_nlp_engine: str = Field(default="spacy", description="Presidio NER backend: spacy or transformers")
+    presidio_nlp_model: str = Field(default="en_core_web_lg", description="spaCy model name or Hugging Face NER model id")
+    presidio_tokenizer_model: str = Field(default="en_core_web_sm", description="spaCy model used for tokenization by the transformers backend")
+    anonymization_mode: str = Field(default="full", description="PII analysis mode: full (NER + patterns) or pattern (patterns only)")
+    anonymization_mode_overrides: Dict[str, str] = Field(default_factory=dict, description="Per-owner anonymization mode, keyed by owner id")
+    anonymization_disabled_entities: List[str] = Field(default_factory=list, description="Entity types detected but left unredacted")
+    anonymization_operator_overrides: Dict[str, str] = Field(default_factory=dict, description="Replacement token per entity type, e.g. {\"PERSON\": \"<NAME>\"}")
+    analysis_cache_enabled: bool = Field(default=True, description="Cache detected PII spans by text and analyzer version")
+    analysis_cache_backend: str = Field(default="local", description="PII analysis cache backend: local or redis")
+    analysis_cache_max_entries: int = Field(default=10000, ge=1, description="Maximum cached analyses before LRU eviction")
+    analysis_chunk_threshold: int = Field(default=100_000, ge=1000, description="Text length above which PII analysis is chunked")
+    analysis_chunk_size: int = Field(default=20_000, ge=1000, description="Characters per PII analysis chunk")
+    analysis_chunk_overlap: int = Field(default=500, ge=0, description="Characters shared by neighbouring analysis chunks")
+    anonymization_batch_size: int = Field(default=32, ge=1, description="Texts per spaCy nlp.pipe batch in batch anonymization")
+    anonymization_n_process: int = Field(default=1, ge=1, description="spaCy processes used by batch anonymization")
+    analysis_workers: int = Field(default=1, ge=1, description="Processes used for chunked PII analysis (1 = in-process; each extra process loads its own NLP model)")
 
+    page_text_min_length: int = Field(default=20, ge=1, description="Characters a page's text layer needs to skip OCR")
+    ocr_backend: str = Field(default="auto", description="OCR backend: auto, tesserocr or pytesseract")
+    ocr_preprocess_profile: str = Field(default="auto", description="OCR preprocessing: auto, fast, balanced or quality")
+    ocr_max_page_width: int = Field(default=2000, ge=500, description="Page width in pixels above which heavy filters downscale (Letter at 300 DPI is 2550)")
+    ocr_dpi: int = Field(default=300, ge=72, le=600, description="OCR page render DPI (escalation DPI when adaptive)")
+    ocr_adaptive_dpi: bool = Field(default=True, description="Render at ocr_initial_dpi first and escalate on low confidence")
+    ocr_initial_dpi: int = Field(default=200, ge=72, le=600, description="First-pass OCR render DPI")
+    ocr_min_confidence: float = Field(default=70.0, ge=0.0, le=100.0, description="Mean word confidence below which a page is re-rendered")
+    ocr_cache_enabled: bool = Field(default=True, description="Cache OCR results by rendered page content hash")
+    ocr_cache_backend: str = Field(default="disk", description="OCR page cache backend: disk or redis")
+    ocr_cache_dir: str = Field(default="cache/ocr", description="Directory for the disk OCR page cache")
+    ocr_cache_max_entries: int = Field(default=20000, ge=1, description="Maximum cached OCR pages before LRU eviction")
+    ocr_parallel: bool = Field(default=True, description="OCR scanned pages in a process pool")
+    ocr_max_workers: int = Field(default=0, ge=0, description="OCR pool processes per Celery child (0 = CPU count // worker_concurrency, at least 1)")
+    ocr_page_timeout: int = Field(default=120, ge=1, description="Per-page OCR timeout in seconds")
+    ocr_render_window: int = Field(default=2, ge=1, le=50, description="Pages rendered at once by sequential OCR")
+
+    embedding_chunk_size: int = Field(default=1000, ge=100, description="Characters per embedded chunk (MiniLM reads about 256 tokens)")
+    embedding_chunk_overlap: int = Field(default=200, ge=0, description="Characters shared by neighbouring embedded chunks")
+    embedding_batch_size: int = Field(default=64, ge=1, description="Texts per sentence-transformer encode batch")
     vector_dimension: int = Field(default=384, ge=128, le=1536, description="Vector embedding dimension")
     similarity_threshold: float = Field(default=0.7, ge=0.0, le=1.0, description="Similarity threshold for search")
+    vector_search_ef_search: Optional[int] = Field(default=None, ge=1, le=1000, description="Default hnsw.ef_search for searches (None = database default)")
+    vector_search_probes: Optional[int] = Field(default=None, ge=1, description="Default ivfflat.probes for searches (None = database default); only used by ivfflat indexes built with scripts/vector_index.py")
+    vector_index_m: int = Field(default=16, ge=2, le=100, description="HNSW m used by scripts/vector_index.py")
+    vector_index_ef_construction: int = Field(default=64, ge=4, le=1000, description="HNSW ef_construction used by scripts/vector_index.py")
+    search_index_cache_enabled: bool = Field(default=False, description="Serve searches from per-user in-memory vector indexes")
+    search_index_cache_max_mb: int = Field(default=512, ge=1, description="Memory budget for cached per-user indexes")
+    search_index_hnsw_min_documents: int = Field(default=5000, ge=1, description="Corpus size from which an HNSW index is built when hnswlib is installed")
+    search_index_hnsw_m: int = Field(default=16, ge=2, description="HNSW graph degree for cached indexes")
+    search_index_hnsw_ef_construction: int = Field(default=200, ge=1, description="HNSW build-time candidate list size")
+    search_index_hnsw_ef_search: int = Field(default=64, ge=1, description="HNSW query-time candidate list size")
 
     class Config:
         env_file = ".env"
@@ -15,6 +15,7 @@ class DocumentStatus(str, Enum):
 class DocumentType(str, Enum):
     PDF = "pdf"
     SCANNED_PDF = "scanned_pdf"
+    HYBRID_PDF = "hybrid_pdf"
 
 
 class DocumentBase(BaseModel):
@@ -69,10 +70,12 @@ class DocumentInDB(DocumentBase):
     file_path: str = Field(..., description="Path to the document file")
     file_size: int = Field(..., gt=0, description="File size in bytes")
     original_filename: str = Field(..., description="Original filename")
+    content_hash: Optional[str] = Field(None, description="SHA-256 of the uploaded file")
     document_type: DocumentType = Field(..., description="Document type")
     status: DocumentStatus = Field(..., description="Document processing status")
     extracted_text: Optional[str] = Field(None, description="Extracted text content")
     anonymized_text: Optional[str] = Field(None, description="Anonymized text content")
+    analyzer_version: Optional[str] = Field(None, description="PII analyzer configuration that produced the stored spans")
     vector_embedding: Optional[List[float]] = Field(None, description="Document vector embedding")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Document metadata")
     created_at: datetime = Field(..., description="Document creation timestamp")
@@ -0,0 +1,84 @@
+from typing import Any, Dict, List, Optional
+import hashlib
+import hmac
+import json
+import logging
+from app.core.config import settings
+from app.utils.lru_store import LocalLRUStore, RedisLRUStore
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCacheService:
+    """Maps text plus analyzer version to the PII spans detected in it.
+
+    Entries are offsets, entity types and scores only, never the matched text,
+    and keys are an HMAC of the text so a cached key cannot be confirmed
+    against guessed text without the application secret. Operators are applied
+    to the cached spans on every read, so changing replacement tokens needs no
+    invalidation.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend or settings.analysis_cache_backend
+        self.max_entries = settings.analysis_cache_max_entries
+        self.store = None
+        self.hits = 0
+        self.misses = 0
+        self._key = hashlib.sha256(f"pii-analysis-cache:{settings.secret_key}".encode()).digest()
+        if settings.analysis_cache_enabled:
+            self._initialize_store()
+
+    def _initialize_store(self):
+        try:
+            if self.backend == "redis":
+                from app.utils.redis_client import get_redis_client
+                self.store = RedisLRUStore(get_redis_client(), "anonora:pii:spans", self.max_entries)
+            else:
+                self.store = LocalLRUStore(self.max_entries)
+        except Exception as e:
+            logger.error(f"Failed to initialize PII analysis cache: {e}")
+            self.store = None
+
+    def make_key(self, text: str, analyzer_version: str) -> str:
+        digest = hmac.new(self._key, digestmod=hashlib.sha256)
+        digest.update(analyzer_version.encode())
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8", "surrogatepass"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        if self.store is None:
+            return None
+        try:
+            value = self.store.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(value)
+        except Exception as e:
+            self.misses += 1
+            logger.error(f"PII analysis cache lookup failed: {e}")
+            return None
+
+    def set(self, key: str, spans: List[Dict[str, Any]]):
+        if self.store is None:
+            return
+        try:
+            self.store.set(key, json.dumps(spans))
+        except Exception as e:
+            logger.error(f"PII analysis cache write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.store is not None,
+            'backend': self.backend,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+analysis_cache = AnalysisCacheService()
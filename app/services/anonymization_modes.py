@@ -0,0 +1,44 @@
+from importlib import metadata
+from typing import Optional
+from app.core.config import settings
+
+# "full" runs spaCy NER alongside the pattern recognizers; "pattern" only runs
+# regex/checksum recognizers and never loads an NER model.
+ANONYMIZATION_MODES = ("full", "pattern")
+
+# Bump when a change to analysis alters which spans are detected (recognizers,
+# thresholds, chunk merging), so stored spans are re-analyzed rather than reused.
+ANALYZER_REVISION = 1
+
+
+def anonymization_model_name(mode: str) -> str:
+    """Model registry entry holding the AnonymizationService for a mode."""
+    return "anonymization" if mode == "full" else f"anonymization_{mode}"
+
+
+def analyzer_version(mode: str) -> str:
+    """Identifies everything that decides which spans a mode detects.
+    
+    Replacement tokens and disabled entity types are deliberately left out:
+    they only change how stored spans are rendered, not the spans themselves.
+    Reads package metadata only, so the API can compare versions without
+    importing Presidio.
+    """
+    try:
+        presidio_version = metadata.version("presidio-analyzer")
+    except metadata.PackageNotFoundError:
+        presidio_version = "unknown"
+    if mode == "pattern":
+        model = "blank"
+    else:
+        model = f"{settings.presidio_nlp_engine}:{settings.presidio_nlp_model}"
+    return f"r{ANALYZER_REVISION}/presidio-{presidio_version}/{mode}/{model}/{settings.presidio_language}"
+
+
+def resolve_anonymization_mode(mode: Optional[str] = None, owner_id: Optional[str] = None) -> str:
+    """Mode for a request: explicit choice, then the owner's override, then the default."""
+    if mode:
+        return mode
+    if owner_id and str(owner_id) in settings.anonymization_mode_overrides:
+        return settings.anonymization_mode_overrides[str(owner_id)]
+    return settings.anonymization_mode
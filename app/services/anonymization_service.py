@@ -1,18 +1,75 @@
-from presidio_analyzer import AnalyzerEngine
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine, RecognizerResult
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 from typing import List, Dict, Any, Optional
 import logging
+from app.core.config import settings
+from app.services.model_registry import model_registry
+from app.services.analysis_cache_service import analysis_cache
+from app.services.anonymization_modes import ANONYMIZATION_MODES, analyzer_version, anonymization_model_name
+from app.services.nlp_engines import PatternOnlyNlpEngine, create_nlp_engine, pattern_only_registry
+from app.utils.text_chunks import split_text_with_overlap, merge_chunk_entities
 
 logger = logging.getLogger(__name__)
 
+_analysis_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _result_spans(results: List[RecognizerResult]) -> List[Dict[str, Any]]:
+    return [
+        {'entity_type': r.entity_type, 'start': r.start, 'end': r.end, 'score': r.score}
+        for r in results
+    ]
+
+
+def _from_spans(spans: List[Dict[str, Any]]) -> List[RecognizerResult]:
+    return [
+        RecognizerResult(span['entity_type'], span['start'], span['end'], span['score'])
+        for span in spans
+    ]
+
+
+def _analyze_chunk(mode: str, text: str) -> List[Dict[str, Any]]:
+    """Pool entry point: analyze one chunk with the worker's own analyzer."""
+    return _result_spans(model_registry.get(anonymization_model_name(mode))._analyze_single(text))
+
+
+def _get_analysis_pool(workers: int) -> ProcessPoolExecutor:
+    """Long-lived pool, so each worker loads the NLP model once rather than per document."""
+    global _analysis_pool
+    if _analysis_pool is None:
+        _analysis_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _analysis_pool
+
+
+def _reset_analysis_pool():
+    """Drop a broken pool so the next long document starts a fresh one."""
+    global _analysis_pool
+    if _analysis_pool is not None:
+        _analysis_pool.shutdown(wait=False, cancel_futures=True)
+        _analysis_pool = None
+
 
 class AnonymizationService:
-    def __init__(self):
-        self.analyzer = AnalyzerEngine()
+    def __init__(self, mode: str = "full"):
+        if mode not in ANONYMIZATION_MODES:
+            raise ValueError(f"Unknown anonymization mode: {mode}")
+        self.mode = mode
+        self.language = settings.presidio_language
+        self.analyzer = self._create_analyzer()
         self.anonymizer = AnonymizerEngine()
-        self.language = "en"
+        self.chunk_threshold = settings.analysis_chunk_threshold
+        self.chunk_size = settings.analysis_chunk_size
+        self.chunk_overlap = settings.analysis_chunk_overlap
+        self.analysis_workers = settings.analysis_workers
         
+        self.disabled_entities = set(settings.anonymization_disabled_entities)
         self.operators = {
             "PERSON": OperatorConfig("replace", {"new_value": "[PERSON]"}),
             "EMAIL_ADDRESS": OperatorConfig("replace", {"new_value": "[EMAIL]"}),
@@ -35,24 +92,124 @@ class AnonymizationService:
             "INDIA_PAN": OperatorConfig("replace", {"new_value": "[PAN]"}),
             "INDIA_AADHAAR": OperatorConfig("replace", {"new_value": "[AADHAAR]"}),
         }
+        for entity_type, new_value in settings.anonymization_operator_overrides.items():
+            self.operators[entity_type] = OperatorConfig("replace", {"new_value": new_value})
+        self.analyzer_version = analyzer_version(self.mode)
+    
+    def _create_analyzer(self) -> AnalyzerEngine:
+        if self.mode == "pattern":
+            nlp_engine = PatternOnlyNlpEngine([self.language])
+            nlp_engine.load()
+            return AnalyzerEngine(
+                nlp_engine=nlp_engine,
+                registry=pattern_only_registry([self.language]),
+                supported_languages=[self.language]
+            )
+        return AnalyzerEngine(
+            nlp_engine=create_nlp_engine(self.language),
+            supported_languages=[self.language]
+        )
+    
+    def _analyze(self, text: str) -> List[RecognizerResult]:
+        """Analyze text, reusing spans cached for identical text and analyzer version."""
+        cache_key = analysis_cache.make_key(text, self.analyzer_version)
+        cached = analysis_cache.get(cache_key)
+        if cached is not None:
+            return _from_spans(cached)
+        
+        if len(text) > self.chunk_threshold:
+            results = self._analyze_chunked(text)
+        else:
+            results = self._analyze_single(text)
+        analysis_cache.set(cache_key, _result_spans(results))
+        return results
+    
+    def _analyze_single(self, text: str) -> List[RecognizerResult]:
+        return self.analyzer.analyze(
+            text=text,
+            entities=[],
+            language=self.language
+        )
+    
+    def _analyze_chunked(self, text: str) -> List[RecognizerResult]:
+        """Analyze long text as overlapping chunks, in parallel when workers are configured.
+        
+        The pool is off by default: every pool process loads its own copy of the
+        NLP model, outside the copy-on-write sharing of Celery's prefork children.
+        
+        Offsets are mapped back to the full text and each entity is taken from the
+        chunk that owns its start, so entities crossing a chunk boundary are
+        reported once, with their full span.
+        """
+        chunks = split_text_with_overlap(text, self.chunk_size, self.chunk_overlap)
+        logger.info(f"Analyzing {len(text)} characters as {len(chunks)} chunks")
+        
+        chunk_entities = None
+        if self.analysis_workers > 1 and len(chunks) > 1:
+            try:
+                pool = _get_analysis_pool(self.analysis_workers)
+                chunk_entities = list(pool.map(
+                    _analyze_chunk, [self.mode] * len(chunks), [chunk for _, chunk in chunks]
+                ))
+            except BrokenProcessPool as e:
+                logger.warning(f"Analysis pool broke, restarting it on next use: {e}")
+                _reset_analysis_pool()
+            except Exception as e:
+                logger.warning(f"Parallel analysis unavailable, analyzing chunks in-process: {e}")
+        
+        if chunk_entities is None:
+            chunk_entities = [_result_spans(self._analyze_single(chunk)) for _, chunk in chunks]
+        
+        return _from_spans(merge_chunk_entities(chunks, chunk_entities))
+    
+    def _to_pii_entities(self, text: str, analyzer_results: List[RecognizerResult]) -> List[Dict[str, Any]]:
+        return [
+            {
+                'entity_type': result.entity_type,
+                'start': result.start,
+                'end': result.end,
+                'score': result.score,
+                'text': text[result.start:result.end]
+            }
+            for result in analyzer_results
+        ]
+    
+    def _summarize(self, analyzer_results: List[RecognizerResult]) -> Dict[str, int]:
+        summary = {}
+        for result in analyzer_results:
+            summary[result.entity_type] = summary.get(result.entity_type, 0) + 1
+        return summary
+    
+    def _enabled(self, analyzer_results: List[RecognizerResult]) -> List[RecognizerResult]:
+        return [result for result in analyzer_results if result.entity_type not in self.disabled_entities]
+    
+    def _anonymize(self, text: str, analyzer_results: List[RecognizerResult]) -> Dict[str, Any]:
+        analyzer_results = self._enabled(analyzer_results)
+        anonymized_result = self.anonymizer.anonymize(
+            text=text,
+            analyzer_results=analyzer_results,
+            operators=self.operators
+        )
+        
+        anonymized_entities = []
+        for item in anonymized_result.items:
+            anonymized_entities.append({
+                'entity_type': item.entity_type,
+                'start': item.start,
+                'end': item.end,
+                'original_text': item.original_text,
+                'anonymized_text': item.text
+            })
+        
+        return {
+            'anonymized_text': anonymized_result.text,
+            'entities_found': len(anonymized_entities),
+            'entities': anonymized_entities
+        }
     
     def detect_pii(self, text: str) -> List[Dict[str, Any]]:
         try:
-            analyzer_results = self.analyzer.analyze(
-                text=text,
-                entities=[],
-                language=self.language
-            )
-            
-            pii_entities = []
-            for result in analyzer_results:
-                pii_entities.append({
-                    'entity_type': result.entity_type,
-                    'start': result.start,
-                    'end': result.end,
-                    'score': result.score,
-                    'text': text[result.start:result.end]
-                })
+            pii_entities = self._to_pii_entities(text, self._enabled(self._analyze(text)))
             
             logger.info(f"Detected {len(pii_entities)} PII entities")
             return pii_entities
@@ -63,37 +220,9 @@ class AnonymizationService:
     
     def anonymize_text(self, text: str) -> Dict[str, Any]:
         try:
-            analyzer_results = self.analyzer.analyze(
-                text=text,
-                entities=[],
-                language=self.language
-            )
-            
-            anonymized_result = self.anonymizer.anonymize(
-                text=text,
-                analyzer_results=analyzer_results,
-                operators=self.operators
-            )
-            
-            anonymized_text = anonymized_result.text
-            anonymized_entities = []
+            result = self._anonymize(text, self._analyze(text))
             
-            for item in anonymized_result.items:
-                anonymized_entities.append({
-                    'entity_type': item.entity_type,
-                    'start': item.start,
-                    'end': item.end,
-                    'original_text': item.original_text,
-                    'anonymized_text': item.text
-                })
-            
-            result = {
-                'anonymized_text': anonymized_text,
-                'entities_found': len(anonymized_entities),
-                'entities': anonymized_entities
-            }
-            
-            logger.info(f"Anonymized text with {len(anonymized_entities)} entities")
+            logger.info(f"Anonymized text with {result['entities_found']} entities")
             return result
             
         except Exception as e:
@@ -104,16 +233,112 @@ class AnonymizationService:
                 'entities': []
             }
     
-    def get_pii_summary(self, text: str) -> Dict[str, int]:
+    def analyze_and_anonymize(self, text: str, sensitivity_threshold: int = 5) -> Dict[str, Any]:
+        """Run the analyzer once and derive every PII output from the same results.
+        
+        Returns what anonymize_text, detect_pii, get_pii_summary and
+        is_sensitive_document would, without analyzing the text four times.
+        ``pii_entities`` carries spans only, not the matched text.
+        """
         try:
-            pii_entities = self.detect_pii(text)
+            result = self._build_result(text, self._analyze(text), sensitivity_threshold)
             
-            summary = {}
-            for entity in pii_entities:
-                entity_type = entity['entity_type']
-                summary[entity_type] = summary.get(entity_type, 0) + 1
+            logger.info(f"Analyzed and anonymized text with {result['entities_found']} entities")
+            return result
             
-            return summary
+        except Exception as e:
+            logger.error(f"Text analysis failed: {e}")
+            return self._empty_result(text)
+    
+    def anonymize_batch(self, texts: List[str], batch_size: Optional[int] = None,
+                        n_process: Optional[int] = None, sensitivity_threshold: int = 5) -> List[Dict[str, Any]]:
+        """analyze_and_anonymize for many texts, streaming them through spaCy's nlp.pipe.
+        
+        Texts long enough to be chunked are analyzed individually; everything
+        else goes through BatchAnalyzerEngine in batches of ``batch_size``
+        across ``n_process`` spaCy processes. Results are in input order.
+        """
+        batch_size = batch_size or settings.anonymization_batch_size
+        n_process = n_process or settings.anonymization_n_process
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        batch_indices = []
+        cache_keys = [analysis_cache.make_key(text, self.analyzer_version) for text in texts]
+        for i, text in enumerate(texts):
+            cached = analysis_cache.get(cache_keys[i])
+            if cached is not None:
+                results[i] = self._build_result(text, _from_spans(cached), sensitivity_threshold)
+            elif len(text) > self.chunk_threshold:
+                results[i] = self.analyze_and_anonymize(text, sensitivity_threshold)
+            else:
+                batch_indices.append(i)
+        
+        try:
+            batch_analyzer = BatchAnalyzerEngine(analyzer_engine=self.analyzer)
+            batch_results = batch_analyzer.analyze_iterator(
+                texts=[texts[i] for i in batch_indices],
+                language=self.language,
+                batch_size=batch_size,
+                n_process=n_process
+            )
+            for i, analyzer_results in zip(batch_indices, batch_results):
+                analysis_cache.set(cache_keys[i], _result_spans(analyzer_results))
+                results[i] = self._build_result(texts[i], analyzer_results, sensitivity_threshold)
+            
+        except Exception as e:
+            logger.error(f"Batch analysis failed, analyzing texts one by one: {e}")
+            for i in batch_indices:
+                if results[i] is None:
+                    results[i] = self.analyze_and_anonymize(texts[i], sensitivity_threshold)
+        
+        logger.info(f"Anonymized batch of {len(texts)} texts")
+        return results
+    
+    def anonymize_from_spans(self, text: str, spans: List[Dict[str, Any]],
+                             sensitivity_threshold: int = 5) -> Dict[str, Any]:
+        """Rebuild the anonymization result from spans stored by an earlier analysis.
+        
+        Applies the current operators and disabled entity types without running
+        the analyzer, so it is only valid while the spans' analyzer_version
+        matches this service's.
+        """
+        try:
+            return self._build_result(text, _from_spans(spans), sensitivity_threshold)
+            
+        except Exception as e:
+            logger.error(f"Anonymization from stored spans failed: {e}")
+            return self._empty_result(text)
+    
+    def _build_result(self, text: str, analyzer_results: List[RecognizerResult],
+                      sensitivity_threshold: int) -> Dict[str, Any]:
+        """Anonymization result; ``pii_spans`` keeps every detected span, including
+        disabled entity types, so re-enabling one needs no new analysis."""
+        result = self._anonymize(text, analyzer_results)
+        enabled = self._enabled(analyzer_results)
+        result.update({
+            'pii_entities': _result_spans(enabled),
+            'pii_spans': _result_spans(analyzer_results),
+            'pii_summary': self._summarize(enabled),
+            'is_sensitive': len(enabled) >= sensitivity_threshold,
+            'analyzer_version': self.analyzer_version
+        })
+        return result
+    
+    def _empty_result(self, text: str) -> Dict[str, Any]:
+        return {
+            'anonymized_text': text,
+            'entities_found': 0,
+            'entities': [],
+            'pii_entities': [],
+            'pii_spans': [],
+            'pii_summary': {},
+            'is_sensitive': False,
+            'analyzer_version': None
+        }
+    
+    def get_pii_summary(self, text: str) -> Dict[str, int]:
+        try:
+            return self._summarize(self._enabled(self._analyze(text)))
             
         except Exception as e:
             logger.error(f"Failed to get PII summary: {e}")
@@ -121,9 +346,8 @@ class AnonymizationService:
     
     def is_sensitive_document(self, text: str, threshold: int = 5) -> bool:
         try:
-            pii_entities = self.detect_pii(text)
-            return len(pii_entities) >= threshold
+            return len(self._enabled(self._analyze(text))) >= threshold
             
         except Exception as e:
             logger.error(f"Failed to determine document sensitivity: {e}")
-            return False 
\ No newline at end of file
+            return False
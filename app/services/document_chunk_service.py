@@ -0,0 +1,37 @@
+from typing import Any, Dict, List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def replace_document_chunks(supabase, document_id: str, chunks: List[Dict[str, Any]]) -> int:
+    """Swap a document's stored chunks for freshly embedded ones.
+
+    The replace_document_chunks SQL function deletes and bulk-inserts in one
+    transaction, so a failure never leaves a partial set of chunks.
+    """
+    rows = [
+        {
+            "chunk_index": chunk["chunk_id"],
+            "content": chunk["text"],
+            "start_pos": chunk["start_pos"],
+            "end_pos": chunk["end_pos"],
+            "embedding": chunk["embedding"]
+        }
+        for chunk in chunks
+    ]
+    result = supabase.rpc("replace_document_chunks", {
+        "target_document_id": document_id,
+        "chunks": rows
+    }).execute()
+    logger.info(f"Stored {len(rows)} chunks for document {document_id}")
+    return result.data if isinstance(result.data, int) else len(rows)
+
+
+def copy_document_chunks(supabase, source_document_id: str, target_document_id: str) -> int:
+    """Copy chunks between documents with identical content, e.g. a deduplicated upload."""
+    result = supabase.rpc("copy_document_chunks", {
+        "source_document_id": source_document_id,
+        "target_document_id": target_document_id
+    }).execute()
+    return result.data if isinstance(result.data, int) else 0
@@ -1,10 +1,11 @@
 from app.services.ocr_service import OCRService
 from app.services.pdf_service import PDFService
-from app.services.anonymization_service import AnonymizationService
-from app.services.embedding_service import EmbeddingService
-from app.services.tagging_service import TaggingService
+from app.services.model_registry import model_registry
+from app.services.anonymization_modes import anonymization_model_name
 from app.models.document import DocumentType, DocumentStatus
-from typing import Dict, Any, Optional, List
+from app.core.config import settings
+from app.utils.vector_search import ExactVectorIndex
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 import os
 from datetime import datetime
@@ -16,34 +17,61 @@ class DocumentProcessingService:
     def __init__(self):
         self.ocr_service = OCRService()
         self.pdf_service = PDFService()
-        self.anonymization_service = AnonymizationService()
-        self.embedding_service = EmbeddingService()
-        self.tagging_service = TaggingService()
     
-    def process_document(self, file_path: str, document_id: str) -> Dict[str, Any]:
+    # Model-backed services are resolved on first use, so a process only loads
+    # the models for the operations it actually performs.
+    @property
+    def anonymization_service(self):
+        return model_registry.get("anonymization")
+    
+    def get_anonymization_service(self, mode: Optional[str] = None):
+        return model_registry.get(anonymization_model_name(mode or settings.anonymization_mode))
+    
+    @property
+    def embedding_service(self):
+        return model_registry.get("embedding")
+    
+    @property
+    def tagging_service(self):
+        return model_registry.get("tagging")
+    
+    def process_document(self, file_path: str, document_id: str,
+                         ocr_profile: Optional[str] = None,
+                         anonymization_mode: Optional[str] = None) -> Dict[str, Any]:
         try:
             logger.info(f"Starting document processing for: {file_path}")
             
-            document_type = self._determine_document_type(file_path)
-            extracted_text = self._extract_text(file_path, document_type)
+            extracted_text, document_type, page_report = self._extract_document(file_path, ocr_profile)
             
             if not extracted_text.strip():
                 raise Exception("No text could be extracted from the document")
             
-            anonymization_result = self.anonymization_service.anonymize_text(extracted_text)
+            anonymization_service = self.get_anonymization_service(anonymization_mode)
+            anonymization_result = anonymization_service.analyze_and_anonymize(extracted_text)
+            if anonymization_result['analyzer_version'] is None:
+                raise Exception("PII analysis failed")
             anonymized_text = anonymization_result['anonymized_text']
             
             embedding = self.embedding_service.create_embedding(anonymized_text)
+            # The model truncates long inputs, so the document vector only covers
+            # the opening; chunk vectors make the rest of the text searchable.
+            chunks = self.embedding_service.create_chunk_embeddings(anonymized_text)
             suggested_tags = self.tagging_service.suggest_tags(extracted_text)
             
             result = {
                 'document_id': document_id,
                 'document_type': document_type.value,
+                'pages': page_report,
                 'extracted_text': extracted_text,
                 'anonymized_text': anonymized_text,
                 'embedding': embedding,
+                'chunks': chunks,
                 'suggested_tags': suggested_tags,
-                'pii_summary': self.anonymization_service.get_pii_summary(extracted_text),
+                'pii_summary': anonymization_result['pii_summary'],
+                'is_sensitive': anonymization_result['is_sensitive'],
+                'pii_spans': anonymization_result['pii_spans'],
+                'analyzer_version': anonymization_result['analyzer_version'],
+                'anonymization_mode': anonymization_service.mode,
                 'processing_status': 'completed',
                 'processed_at': datetime.utcnow().isoformat()
             }
@@ -60,37 +88,78 @@ class DocumentProcessingService:
                 'processed_at': datetime.utcnow().isoformat()
             }
     
-    def _determine_document_type(self, file_path: str) -> DocumentType:
+    def _extract_document(self, file_path: str,
+                          ocr_profile: Optional[str] = None) -> Tuple[str, DocumentType, List[Dict[str, Any]]]:
+        """Extract text with per-page routing between the text layer and OCR.
+        
+        Every page's text layer is read once; only pages without a usable text
+        layer are sent to OCR. Returns the text, the document classification and
+        a per-page report of the method used and the time it took.
+        """
         try:
-            if self.pdf_service.is_digital_pdf(file_path):
-                return DocumentType.PDF
+            pages = self.pdf_service.extract_pages(file_path)
             
-            if self.ocr_service.is_scanned_pdf(file_path):
-                return DocumentType.SCANNED_PDF
+            page_texts = {}
+            page_report = []
+            ocr_page_numbers = []
+            for page in pages:
+                if self.pdf_service.has_page_text_layer(page['text']):
+                    page_texts[page['page']] = page['text']
+                    page_report.append({
+                        'page': page['page'],
+                        'method': 'text',
+                        'seconds': round(page['seconds'], 4),
+                        'status': 'ok'
+                    })
+                else:
+                    ocr_page_numbers.append(page['page'])
             
-            return DocumentType.PDF
+            if ocr_page_numbers or not pages:
+                logger.info(f"Using OCR for {len(ocr_page_numbers) or 'all'} image-only pages")
+                ocr_results = self.ocr_service.ocr_pdf_pages(
+                    file_path, ocr_page_numbers if pages else None, profile=ocr_profile
+                )
+                for result in ocr_results:
+                    page_texts[result['page']] = result['text']
+                    page_report.append({
+                        'page': result['page'],
+                        'method': 'ocr',
+                        'seconds': round(result['seconds'], 4),
+                        'status': result['status'],
+                        'preprocess_profile': result.get('preprocess_profile'),
+                        'preprocess_seconds': round(result.get('preprocess_seconds', 0.0), 4),
+                        'confidence': result.get('confidence'),
+                        'dpi': result.get('dpi'),
+                        'escalated': result.get('escalated', False),
+                        'cache_hit': result.get('cache_hit', False)
+                    })
+            
+            page_report.sort(key=lambda x: x['page'])
+            extracted_text = "\n\n".join(
+                page_texts[page['page']] for page in page_report
+                if page_texts.get(page['page'], '').strip()
+            )
+            
+            return extracted_text, self._classify_pages(page_report), page_report
             
-        except Exception as e:
-            logger.error(f"Error determining document type: {e}")
-            return DocumentType.PDF
-    
-    def _extract_text(self, file_path: str, document_type: DocumentType) -> str:
-        try:
-            if document_type == DocumentType.SCANNED_PDF:
-                logger.info("Using OCR for scanned PDF")
-                return self.ocr_service.extract_text_from_pdf(file_path)
-            else:
-                logger.info("Using direct text extraction for digital PDF")
-                return self.pdf_service.extract_text_from_pdf(file_path)
-                
         except Exception as e:
             logger.error(f"Text extraction failed: {e}")
-            return ""
+            return "", DocumentType.PDF, []
+    
+    def _classify_pages(self, page_report: List[Dict[str, Any]]) -> DocumentType:
+        methods = {page['method'] for page in page_report}
+        if methods == {'ocr'}:
+            return DocumentType.SCANNED_PDF
+        if 'ocr' in methods:
+            return DocumentType.HYBRID_PDF
+        return DocumentType.PDF
     
-    def process_document_async(self, file_path: str, document_id: str) -> str:
+    def process_document_async(self, file_path: str, document_id: str,
+                               ocr_profile: Optional[str] = None,
+                               anonymization_mode: Optional[str] = None) -> str:
         try:
             from app.celery_app import process_document_task
-            task = process_document_task.delay(file_path, document_id)
+            task = process_document_task.delay(file_path, document_id, ocr_profile, anonymization_mode)
             return task.id
         except Exception as e:
             logger.error(f"Failed to start async processing: {e}")
@@ -111,12 +180,12 @@ class DocumentProcessingService:
     
     def extract_text_only(self, file_path: str) -> Dict[str, Any]:
         try:
-            document_type = self._determine_document_type(file_path)
-            extracted_text = self._extract_text(file_path, document_type)
+            extracted_text, document_type, page_report = self._extract_document(file_path)
             
             return {
                 'extracted_text': extracted_text,
                 'document_type': document_type.value,
+                'pages': page_report,
                 'success': bool(extracted_text.strip())
             }
         except Exception as e:
@@ -128,19 +197,29 @@ class DocumentProcessingService:
                 'error': str(e)
             }
     
-    def anonymize_text_only(self, text: str) -> Dict[str, Any]:
+    def anonymize_text_only(self, text: str, anonymization_mode: Optional[str] = None) -> Dict[str, Any]:
         try:
-            result = self.anonymization_service.anonymize_text(text)
+            result = self.get_anonymization_service(anonymization_mode).analyze_and_anonymize(text)
+            if result['analyzer_version'] is None:
+                raise ValueError("PII analysis failed")
             return {
                 'anonymized_text': result['anonymized_text'],
                 'entities_found': result['entities_found'],
+                'pii_entities': result['pii_entities'],
+                'pii_spans': result['pii_spans'],
+                'pii_summary': result['pii_summary'],
+                'analyzer_version': result['analyzer_version'],
                 'success': True
             }
         except Exception as e:
             logger.error(f"Text anonymization failed: {e}")
             return {
-                'anonymized_text': text,
+                'anonymized_text': None,
                 'entities_found': 0,
+                'pii_entities': [],
+                'pii_spans': [],
+                'pii_summary': {},
+                'analyzer_version': None,
                 'success': False,
                 'error': str(e)
             }
@@ -152,6 +231,13 @@ class DocumentProcessingService:
             logger.error(f"Embedding creation failed: {e}")
             return None
     
+    def create_chunk_embeddings_only(self, text: str) -> List[Dict[str, Any]]:
+        try:
+            return self.embedding_service.create_chunk_embeddings(text)
+        except Exception as e:
+            logger.error(f"Chunk embedding creation failed: {e}")
+            return []
+    
     def suggest_tags_only(self, text: str) -> List[str]:
         try:
             return self.tagging_service.suggest_tags(text)
@@ -160,25 +246,23 @@ class DocumentProcessingService:
             return []
     
     def search_similar_documents(self, query: str, document_embeddings: List[Dict[str, Any]], 
-                                threshold: float = None) -> List[Dict[str, Any]]:
+                                threshold: float = None, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         try:
             query_embedding = self.embedding_service.create_embedding(query)
             if not query_embedding:
                 return []
             
+            index = ExactVectorIndex(
+                list(range(len(document_embeddings))),
+                (doc.get('embedding') for doc in document_embeddings)
+            )
+            
             similar_documents = []
-            for doc in document_embeddings:
-                if 'embedding' in doc and doc['embedding']:
-                    similarity = self.embedding_service.calculate_similarity(
-                        query_embedding, doc['embedding']
-                    )
-                    
-                    if threshold is None or similarity >= threshold:
-                        doc_copy = doc.copy()
-                        doc_copy['similarity_score'] = similarity
-                        similar_documents.append(doc_copy)
-            
-            similar_documents.sort(key=lambda x: x['similarity_score'], reverse=True)
+            for position, similarity in index.search(query_embedding, top_k, threshold):
+                doc_copy = document_embeddings[position].copy()
+                doc_copy['similarity_score'] = similarity
+                similar_documents.append(doc_copy)
+            
             return similar_documents
             
         except Exception as e:
@@ -190,9 +274,9 @@ class DocumentProcessingService:
             return {
                 'ocr_service': True,
                 'pdf_service': True,
-                'anonymization_service': True,
-                'embedding_service': self.embedding_service.model is not None,
-                'tagging_service': self.tagging_service.classifier is not None
+                'anonymization_service': model_registry.is_loaded("anonymization"),
+                'embedding_service': model_registry.is_loaded("embedding"),
+                'tagging_service': model_registry.is_loaded("tagging")
             }
         except Exception as e:
             logger.error(f"Failed to get services status: {e}")
@@ -3,6 +3,8 @@ from typing import List, Dict, Any, Optional
 import numpy as np
 import logging
 from app.core.config import settings
+from app.utils.text_chunks import split_text_with_overlap
+from app.utils.vector_search import ExactVectorIndex, decode_embedding
 import uuid
 logger = logging.getLogger(__name__)
 
@@ -24,6 +26,9 @@ class EmbeddingService:
             logger.error(f"Failed to load sentence transformer model: {e}")
             raise
     
+    def share_memory(self):
+        self.model.share_memory()
+    
     def create_embedding(self, text: str) -> Optional[List[float]]:
         try:
             if not self.model:
@@ -44,7 +49,7 @@ class EmbeddingService:
             if not self.model:
                 raise Exception("Model not loaded")
             
-            embeddings = self.model.encode(texts)
+            embeddings = self.model.encode(texts, batch_size=settings.embedding_batch_size)
             embeddings_list = [embedding.tolist() for embedding in embeddings]
             
             logger.info(f"Created embeddings for {len(texts)} texts")
@@ -54,20 +59,35 @@ class EmbeddingService:
             logger.error(f"Failed to create batch embeddings: {e}")
             return [None] * len(texts)
     
-    def create_chunk_embeddings(self, text: str, chunk_size: int = 512, overlap: int = 50) -> List[Dict[str, Any]]:
+    def create_chunk_embeddings(self, text: str, chunk_size: Optional[int] = None,
+                                overlap: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Embed text as overlapping chunks short enough for the model's max sequence length.
+        
+        Chunks are cut on paragraph, sentence or word boundaries and encoded in
+        batches; ``start_pos``/``end_pos`` are character offsets into ``text``.
+        """
         try:
-            chunks = self._split_text_into_chunks(text, chunk_size, overlap)
-            embeddings = self.create_embeddings_batch(chunks)
+            chunks = [
+                (offset, chunk) for offset, chunk in split_text_with_overlap(
+                    text,
+                    chunk_size or settings.embedding_chunk_size,
+                    settings.embedding_chunk_overlap if overlap is None else overlap
+                )
+                if chunk.strip()
+            ]
+            if not chunks:
+                return []
+            embeddings = self.create_embeddings_batch([chunk for _, chunk in chunks])
             
             chunk_embeddings = []
-            for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
+            for i, ((offset, chunk), embedding) in enumerate(zip(chunks, embeddings)):
                 if embedding:
                     chunk_embeddings.append({
                         'chunk_id': i,
                         'text': chunk,
                         'embedding': embedding,
-                        'start_pos': i * (chunk_size - overlap),
-                        'end_pos': (i + 1) * chunk_size
+                        'start_pos': offset,
+                        'end_pos': offset + len(chunk)
                     })
             
             logger.info(f"Created {len(chunk_embeddings)} chunk embeddings")
@@ -77,51 +97,39 @@ class EmbeddingService:
             logger.error(f"Failed to create chunk embeddings: {e}")
             return []
     
-    def _split_text_into_chunks(self, text: str, chunk_size: int, overlap: int) -> List[str]:
-        chunks = []
-        words = text.split()
-        
-        if len(words) <= chunk_size:
-            return [text]
+    def calculate_similarity(self, embedding1: Any, embedding2: Any) -> float:
+        """Cosine similarity of two embeddings in any format decode_embedding accepts.
         
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk_words = words[i:i + chunk_size]
-            chunk_text = " ".join(chunk_words)
-            chunks.append(chunk_text)
-        
-        return chunks
-    
-    def calculate_similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
+        For more than a handful of candidates use find_similar_chunks or
+        ExactVectorIndex, which score everything in one matrix product.
+        """
         try:
-            embedding2 = eval(embedding2)
-
-
-            vec2 = np.array(embedding2)
-            vec1 = np.array(embedding1)
-
-            cosine_similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-            return float(cosine_similarity)
-
-            cosine_similarity = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
-            return float(cosine_similarity)
+            vec1 = decode_embedding(embedding1)
+            vec2 = decode_embedding(embedding2)
+            if vec1 is None or vec2 is None or vec1.size != vec2.size:
+                return 0.0
+            
+            norms = np.linalg.norm(vec1) * np.linalg.norm(vec2)
+            return float(np.dot(vec1, vec2) / norms) if norms else 0.0
             
         except Exception as e:
             logger.error(f"Failed to calculate similarity: {e}")
             return 0.0
     
     def find_similar_chunks(self, query_embedding: List[float], chunk_embeddings: List[Dict[str, Any]], 
-                           threshold: float = None) -> List[Dict[str, Any]]:
+                           threshold: float = None, top_k: Optional[int] = None) -> List[Dict[str, Any]]:
         try:
-            similar_chunks = []
+            index = ExactVectorIndex(
+                list(range(len(chunk_embeddings))),
+                (chunk_data['embedding'] for chunk_data in chunk_embeddings)
+            )
             
-            for chunk_data in chunk_embeddings:
-                similarity = self.calculate_similarity(query_embedding, chunk_data['embedding'])
-                
-                if threshold is None or similarity >= threshold:
-                    chunk_data['similarity'] = similarity
-                    similar_chunks.append(chunk_data)
+            similar_chunks = []
+            for position, similarity in index.search(query_embedding, top_k, threshold):
+                chunk_data = chunk_embeddings[position]
+                chunk_data['similarity'] = similarity
+                similar_chunks.append(chunk_data)
             
-            similar_chunks.sort(key=lambda x: x['similarity'], reverse=True)
             return similar_chunks
             
         except Exception as e:
@@ -0,0 +1,124 @@
+from typing import Any, Callable, Dict, Iterable, Optional
+import logging
+import threading
+import time
+from app.utils.process_memory import MB, get_rss_bytes
+
+logger = logging.getLogger(__name__)
+
+# Models each process role needs. The API only embeds queries; redaction,
+# tagging and document embedding run in Celery workers.
+ROLE_MODELS = {
+    "api": ["embedding"],
+    "worker": ["anonymization", "anonymization_pattern", "embedding", "tagging"],
+}
+
+
+class ModelRegistry:
+    """Loads each heavy model-backed service once per process and shares it.
+
+    Celery tasks and API handlers ask the registry instead of constructing
+    services themselves, so spaCy, BART and the sentence transformer are loaded
+    at most once per worker process.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.RLock()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        self._loaders[name] = loader
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            if name in self._instances:
+                return self._instances[name]
+
+            loader = self._loaders[name]
+            logger.info(f"Loading model '{name}'")
+            rss_before = get_rss_bytes()
+            started = time.perf_counter()
+            try:
+                instance = loader()
+            except Exception as e:
+                self._stats[name] = {'loaded': False, 'error': str(e)}
+                logger.error(f"Failed to load model '{name}': {e}")
+                raise
+
+            self._stats[name] = {
+                'loaded': True,
+                'load_seconds': round(time.perf_counter() - started, 3),
+                'rss_delta_mb': round((get_rss_bytes() - rss_before) / MB, 1)
+            }
+            self._instances[name] = instance
+            logger.info(f"Loaded model '{name}' in {self._stats[name]['load_seconds']}s "
+                        f"(+{self._stats[name]['rss_delta_mb']} MB RSS)")
+            return instance
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def preload(self, names: Optional[Iterable[str]] = None):
+        for name in names if names is not None else list(self._loaders):
+            try:
+                self.get(name)
+            except Exception:
+                pass
+
+    def preload_for_role(self, role: str):
+        self.preload(ROLE_MODELS.get(role, []))
+
+    def share_memory(self):
+        """Move loaded models' tensors into shared memory ahead of a fork.
+
+        Shared tensor storage is never duplicated by children, even when
+        neighbouring heap pages are written and copied. The tensors live in
+        /dev/shm, which must be large enough to hold them all; when it fills up,
+        the process fails with ENOSPC or SIGBUS.
+        """
+        for name, instance in list(self._instances.items()):
+            if hasattr(instance, "share_memory"):
+                try:
+                    instance.share_memory()
+                except Exception as e:
+                    logger.warning(f"Could not share memory for model '{name}': {e}")
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model load status, load time and RSS growth attributed to the load."""
+        return {
+            name: dict(self._stats.get(name, {'loaded': False}))
+            for name in self._loaders
+        }
+
+
+def _load_anonymization_service():
+    from app.services.anonymization_service import AnonymizationService
+    return AnonymizationService()
+
+
+def _load_pattern_anonymization_service():
+    from app.services.anonymization_service import AnonymizationService
+    return AnonymizationService(mode="pattern")
+
+
+def _load_embedding_service():
+    from app.services.embedding_service import EmbeddingService
+    return EmbeddingService()
+
+
+def _load_tagging_service():
+    from app.services.tagging_service import TaggingService
+    return TaggingService()
+
+
+model_registry = ModelRegistry()
+model_registry.register("anonymization", _load_anonymization_service)
+model_registry.register("anonymization_pattern", _load_pattern_anonymization_service)
+model_registry.register("embedding", _load_embedding_service)
+model_registry.register("tagging", _load_tagging_service)
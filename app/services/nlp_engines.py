@@ -0,0 +1,75 @@
+from presidio_analyzer import RecognizerRegistry
+from presidio_analyzer.nlp_engine import NlpEngine, NlpEngineProvider, SpacyNlpEngine
+from spacy.language import Language
+from typing import Any, Dict, List
+import logging
+import spacy
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Recognizers that need a trained NER model; everything else in presidio's
+# predefined set is a regex, checksum or deny-list recognizer.
+NER_RECOGNIZERS = ("SpacyRecognizer", "StanzaRecognizer", "TransformersRecognizer")
+
+
+@Language.component("lowercase_lemmas")
+def _lowercase_lemmas(doc):
+    # Context words ("ssn", "phone", ...) are matched against lemmas; a blank
+    # pipeline has no lemmatizer, so lowercase tokens stand in for them.
+    for token in doc:
+        token.lemma_ = token.lower_
+    return doc
+
+
+class PatternOnlyNlpEngine(SpacyNlpEngine):
+    """spaCy engine with a blank tokenizer-only pipeline and no NER model.
+
+    Pattern recognizers only need tokens and lemmas for context scoring, so
+    this loads in milliseconds instead of loading en_core_web_lg.
+    """
+
+    def __init__(self, languages: List[str]):
+        super().__init__(models=[{"lang_code": lang, "model_name": f"blank_{lang}"} for lang in languages])
+        self.languages = languages
+
+    def load(self):
+        self.nlp = {}
+        for lang in self.languages:
+            nlp = spacy.blank(lang)
+            nlp.add_pipe("lowercase_lemmas")
+            self.nlp[lang] = nlp
+
+
+def pattern_only_registry(languages: List[str]) -> RecognizerRegistry:
+    registry = RecognizerRegistry(supported_languages=languages)
+    registry.load_predefined_recognizers(languages=languages)
+    for name in NER_RECOGNIZERS:
+        if any(recognizer.name == name for recognizer in registry.recognizers):
+            registry.remove_recognizer(name)
+    return registry
+
+
+def nlp_configuration(engine: str, model: str, language: str) -> Dict[str, Any]:
+    """NlpEngineProvider configuration for a spaCy or transformers NER model.
+
+    Transformer pipelines still need a small spaCy model for tokenization and
+    lemmas; the transformer only replaces the NER step.
+    """
+    if engine == "transformers":
+        model_name: Any = {"spacy": settings.presidio_tokenizer_model, "transformers": model}
+    elif engine == "spacy":
+        model_name = model
+    else:
+        raise ValueError(f"Unknown NLP engine: {engine}")
+    return {
+        "nlp_engine_name": engine,
+        "models": [{"lang_code": language, "model_name": model_name}],
+    }
+
+
+def create_nlp_engine(language: str) -> NlpEngine:
+    """NLP engine for the deployment's configured tier, loaded and ready."""
+    configuration = nlp_configuration(settings.presidio_nlp_engine, settings.presidio_nlp_model, language)
+    logger.info(f"Loading {settings.presidio_nlp_engine} NLP model '{settings.presidio_nlp_model}' for '{language}'")
+    return NlpEngineProvider(nlp_configuration=configuration).create_engine()
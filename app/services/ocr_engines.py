@@ -0,0 +1,141 @@
+from abc import ABC, abstractmethod
+import pytesseract
+from PIL import Image
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+import logging
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+logger = logging.getLogger(__name__)
+
+# One engine per (backend, languages, psm) per process, so a worker loads the
+# Tesseract model once and reuses it for every page it OCRs.
+_engines: Dict[Tuple[str, str, int], "OCREngine"] = {}
+
+
+class OCREngine(ABC):
+    name = "base"
+
+    def __init__(self, languages: List[str], psm: int = 6):
+        self.lang = '+'.join(languages)
+        self.psm = psm
+
+    @abstractmethod
+    def recognize(self, image: np.ndarray) -> str:
+        """Text recognized in a preprocessed page image."""
+
+    @abstractmethod
+    def recognize_with_confidence(self, image: np.ndarray) -> Tuple[str, Optional[float]]:
+        """Text plus Tesseract's mean word confidence (0-100, None when no words were found)."""
+
+
+class PytesseractEngine(OCREngine):
+    """Runs the tesseract CLI once per page through pytesseract."""
+
+    name = "pytesseract"
+
+    def recognize(self, image: np.ndarray) -> str:
+        return pytesseract.image_to_string(
+            Image.fromarray(image),
+            lang=self.lang,
+            config=f'--psm {self.psm}'
+        )
+
+    def recognize_with_confidence(self, image: np.ndarray) -> Tuple[str, Optional[float]]:
+        data = pytesseract.image_to_data(
+            Image.fromarray(image),
+            lang=self.lang,
+            config=f'--psm {self.psm}',
+            output_type=pytesseract.Output.DICT
+        )
+
+        lines = []
+        confidences = []
+        current_line = None
+        current_paragraph = None
+        for i, word in enumerate(data['text']):
+            word = word.strip()
+            if not word:
+                continue
+
+            paragraph = (data['block_num'][i], data['par_num'][i])
+            line = paragraph + (data['line_num'][i],)
+            if line != current_line:
+                if current_paragraph is not None and paragraph != current_paragraph:
+                    lines.append("")
+                lines.append(word)
+                current_line, current_paragraph = line, paragraph
+            else:
+                lines[-1] += " " + word
+
+            confidence = float(data['conf'][i])
+            if confidence >= 0:
+                confidences.append(confidence)
+
+        mean_confidence = sum(confidences) / len(confidences) if confidences else None
+        return "\n".join(lines), mean_confidence
+
+
+class TesserocrEngine(OCREngine):
+    """Keeps a loaded Tesseract API handle and passes raw pixel buffers to it."""
+
+    name = "tesserocr"
+
+    def __init__(self, languages: List[str], psm: int = 6):
+        super().__init__(languages, psm)
+        if tesserocr is None:
+            raise RuntimeError("tesserocr is not installed")
+        self.api = tesserocr.PyTessBaseAPI(lang=self.lang, psm=psm)
+
+    def recognize(self, image: np.ndarray) -> str:
+        return self.recognize_with_confidence(image)[0]
+
+    def recognize_with_confidence(self, image: np.ndarray) -> Tuple[str, Optional[float]]:
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        bytes_per_pixel = 1 if image.ndim == 2 else image.shape[2]
+
+        self.api.SetImageBytes(
+            image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel
+        )
+        text = self.api.GetUTF8Text()
+        # MeanTextConf reuses the recognition GetUTF8Text just ran
+        confidence = float(self.api.MeanTextConf()) if text.strip() else None
+        self.api.Clear()
+        return text, confidence
+
+    def close(self):
+        self.api.End()
+
+
+ENGINES = {
+    PytesseractEngine.name: PytesseractEngine,
+    TesserocrEngine.name: TesserocrEngine,
+}
+
+
+def get_ocr_engine(backend: str, languages: List[str], psm: int = 6) -> OCREngine:
+    """Return this process's engine for the backend, creating it on first use.
+
+    ``auto`` prefers tesserocr and falls back to pytesseract when it is not
+    installed or fails to initialise.
+    """
+    if backend == "auto":
+        backend = TesserocrEngine.name if tesserocr is not None else PytesseractEngine.name
+
+    key = (backend, '+'.join(languages), psm)
+    if key not in _engines:
+        try:
+            _engines[key] = ENGINES[backend](languages, psm)
+            logger.info(f"Initialized {backend} OCR engine")
+        except Exception as e:
+            if backend == PytesseractEngine.name:
+                raise
+            logger.warning(f"Failed to initialize {backend} OCR engine, using pytesseract: {e}")
+            _engines[key] = PytesseractEngine(languages, psm)
+
+    return _engines[key]
@@ -1,83 +1,481 @@
-import pytesseract
 from PIL import Image
 import pdf2image
 import cv2
 import numpy as np
-
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+import multiprocessing
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 import logging
+import os
+import time
+from app.core.config import settings
+from app.services.ocr_engines import get_ocr_engine, PytesseractEngine
+from app.services.page_cache_service import PageCacheService
 
 
 logger = logging.getLogger(__name__)
 
 
+PREPROCESS_PROFILES = ("fast", "balanced", "quality")
+
+# Thresholds used by the auto profile, measured on a full-resolution centre crop
+CLEAN_NOISE_SIGMA = 3.0
+NOISY_NOISE_SIGMA = 8.0
+LOW_CONTRAST_STDDEV = 40.0
+
+
+def _ocr_pdf_page(pdf_path: str, page_number: int, profile: str) -> Dict[str, Any]:
+    """Pool entry point: render and OCR one page in a worker process."""
+    return OCRService().ocr_pdf_page(pdf_path, page_number, profile)
+
+
 class OCRService:
     def __init__(self):
         self.languages = ['eng']
+        self.dpi = settings.ocr_dpi
+        # Every Celery child runs its own pool, so by default the CPUs are split
+        # between the children rather than each child claiming all of them
+        self.max_workers = settings.ocr_max_workers or max(
+            1, (os.cpu_count() or 1) // settings.worker_concurrency
+        )
+        self.page_timeout = settings.ocr_page_timeout
+        self.render_window = settings.ocr_render_window
+        self.backend = settings.ocr_backend
+        self.psm = 6
+        self.preprocess_profile = settings.ocr_preprocess_profile
+        self.max_page_width = settings.ocr_max_page_width
+        self.preprocess_stats: Dict[str, Dict[str, float]] = {}
+        self.adaptive_dpi = settings.ocr_adaptive_dpi
+        self.render_dpi = min(settings.ocr_initial_dpi, self.dpi) if self.adaptive_dpi else self.dpi
+        self.min_confidence = settings.ocr_min_confidence
+        self.dpi_stats = {'pages': 0, 'escalations': 0, 'pages_by_dpi': {}}
+        self.page_cache = PageCacheService() if settings.ocr_cache_enabled else None
+        self.cache_stats = {'hits': 0, 'misses': 0}
+    
+    def extract_text_from_image(self, image: Image.Image, profile: Optional[str] = None) -> str:
+        return self._ocr_image(image, profile)['text']
     
-    def extract_text_from_image(self, image: Image.Image) -> str:
+    def _ocr_image(self, image: Image.Image, profile: Optional[str] = None) -> Dict[str, Any]:
         try:
             opencv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
             
-            processed_image = self._preprocess_image(opencv_image)
+            started = time.perf_counter()
+            processed_image, used_profile = self._preprocess(opencv_image, profile)
+            preprocess_seconds = time.perf_counter() - started
             
-            pil_image = Image.fromarray(processed_image)
+            text, confidence = self._recognize(processed_image)
             
-            text = pytesseract.image_to_string(
-                pil_image,
-                lang='+'.join(self.languages),
-                config='--psm 6'
-            )
-            
-            return text.strip()
+            return {
+                'text': text.strip(),
+                'confidence': confidence,
+                'preprocess_profile': used_profile,
+                'preprocess_seconds': preprocess_seconds
+            }
             
         except Exception as e:
             logger.error(f"OCR extraction failed: {e}")
-            return ""
+            return {'text': '', 'confidence': None, 'preprocess_profile': None, 'preprocess_seconds': 0.0}
     
-    def _preprocess_image(self, image: np.ndarray) -> np.ndarray:
+    def _recognize(self, image: np.ndarray) -> Tuple[str, Optional[float]]:
+        engine = get_ocr_engine(self.backend, self.languages, self.psm)
+        try:
+            return engine.recognize_with_confidence(image)
+        except Exception as e:
+            if engine.name == PytesseractEngine.name:
+                raise
+            logger.warning(f"{engine.name} OCR failed, retrying with pytesseract: {e}")
+            fallback = get_ocr_engine(PytesseractEngine.name, self.languages, self.psm)
+            return fallback.recognize_with_confidence(image)
+    
+    def _ocr_rendered_page(self, pdf_path: str, page_number: int, image: Image.Image,
+                           profile: Optional[str] = None) -> Dict[str, Any]:
+        """OCR a page rendered at render_dpi, answering repeated pages from the page cache."""
+        if self.page_cache is None:
+            return self._ocr_rendered_page_uncached(pdf_path, page_number, image, profile)
+        
+        cache_key = self.page_cache.make_key(image, self._cache_config(profile))
+        cached = self.page_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Page {page_number} served from OCR cache")
+            cached.update(preprocess_seconds=0.0, cache_hit=True)
+            return cached
+        
+        result = self._ocr_rendered_page_uncached(pdf_path, page_number, image, profile)
+        self.page_cache.set(cache_key, {
+            field: result.get(field)
+            for field in ('text', 'confidence', 'preprocess_profile', 'dpi', 'escalated')
+        })
+        result['cache_hit'] = False
+        return result
+    
+    def _cache_config(self, profile: Optional[str]) -> str:
+        """Everything besides the pixels that changes the OCR result of a page."""
+        return ":".join(str(part) for part in (
+            profile or self.preprocess_profile, '+'.join(self.languages), self.psm, self.backend,
+            self.render_dpi, self.dpi, self.min_confidence
+        ))
+    
+    def _ocr_rendered_page_uncached(self, pdf_path: str, page_number: int, image: Image.Image,
+                                    profile: Optional[str] = None) -> Dict[str, Any]:
+        """OCR a page rendered at render_dpi, re-rendering at full DPI when confidence is low."""
+        result = self._ocr_image(image, profile)
+        result['dpi'] = self.render_dpi
+        result['escalated'] = False
+        
+        confidence = result['confidence']
+        if self.render_dpi >= self.dpi or confidence is None or confidence >= self.min_confidence:
+            return result
+        
+        logger.info(f"Page {page_number} confidence {confidence:.1f} below {self.min_confidence}, "
+                    f"re-rendering at {self.dpi} DPI")
+        image = self._render_page(pdf_path, page_number, self.dpi)
+        if image is None:
+            return result
+        retry = self._ocr_image(image, profile)
+        image.close()
+        
+        retry['preprocess_seconds'] += result['preprocess_seconds']
+        retry['dpi'] = self.dpi
+        retry['escalated'] = True
+        if retry['confidence'] is None or retry['confidence'] < confidence:
+            # Keep the low-DPI text, but still count the escalation
+            result.update(escalated=True, preprocess_seconds=retry['preprocess_seconds'])
+            return result
+        return retry
+    
+    def _render_page(self, pdf_path: str, page_number: int, dpi: int) -> Optional[Image.Image]:
+        images = pdf2image.convert_from_path(
+            pdf_path,
+            dpi=dpi,
+            fmt='PNG',
+            first_page=page_number,
+            last_page=page_number
+        )
+        return images[0] if images else None
+    
+    def _preprocess_image(self, image: np.ndarray, profile: Optional[str] = None) -> np.ndarray:
+        return self._preprocess(image, profile)[0]
+    
+    def _preprocess(self, image: np.ndarray, profile: Optional[str] = None) -> Tuple[np.ndarray, str]:
+        """Binarize a BGR page image with the given profile; returns the image and the profile used."""
+        profile = profile or self.preprocess_profile
         try:
             gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
             
-            denoised = cv2.fastNlMeansDenoising(gray)
+            if profile not in PREPROCESS_PROFILES:
+                profile = self._choose_profile(gray)
             
-            thresh = cv2.adaptiveThreshold(
+            if profile == "fast":
+                _, processed = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+                return processed, profile
+            
+            if profile == "balanced":
+                denoised = cv2.medianBlur(gray, 3)
+            else:
+                # Non-local means is the slowest filter here; cap the page width first
+                gray = self._limit_width(gray)
+                denoised = cv2.fastNlMeansDenoising(gray)
+            
+            processed = cv2.adaptiveThreshold(
                 denoised, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2
             )
             
-            kernel = np.ones((1, 1), np.uint8)
-            processed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-            
-            return processed
+            return processed, profile
             
         except Exception as e:
             logger.error(f"Image preprocessing failed: {e}")
-            return image
+            return image, profile
     
-    def extract_text_from_pdf(self, pdf_path: str) -> str:
-        try:
-            images = pdf2image.convert_from_path(
-                pdf_path,
-                dpi=300,
-                fmt='PNG'
-            )
+    def _choose_profile(self, gray: np.ndarray) -> str:
+        """Pick a profile from a cheap noise and contrast estimate of the page."""
+        height, width = gray.shape[:2]
+        crop_h, crop_w = min(height, 512), min(width, 512)
+        top, left = (height - crop_h) // 2, (width - crop_w) // 2
+        crop = gray[top:top + crop_h, left:left + crop_w]
+        
+        noise = self._estimate_noise(crop)
+        contrast = float(crop.std())
+        
+        if noise < CLEAN_NOISE_SIGMA and contrast >= LOW_CONTRAST_STDDEV:
+            return "fast"
+        if noise < NOISY_NOISE_SIGMA:
+            return "balanced"
+        return "quality"
+    
+    @staticmethod
+    def _estimate_noise(gray: np.ndarray) -> float:
+        """Immerkaer's fast noise variance estimate (sigma, in grey levels)."""
+        height, width = gray.shape[:2]
+        if height < 3 or width < 3:
+            return 0.0
+        kernel = np.array([[1, -2, 1], [-2, 4, -2], [1, -2, 1]], dtype=np.float32)
+        response = cv2.filter2D(gray.astype(np.float32), -1, kernel)[1:-1, 1:-1]
+        return float(np.sum(np.abs(response)) * np.sqrt(0.5 * np.pi) / (6 * (width - 2) * (height - 2)))
+    
+    def _limit_width(self, gray: np.ndarray) -> np.ndarray:
+        width = gray.shape[1]
+        if width <= self.max_page_width:
+            return gray
+        scale = self.max_page_width / width
+        return cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    
+    def _record_page_stats(self, page_results: List[Dict[str, Any]]):
+        for page in page_results:
+            profile = page.get('preprocess_profile')
+            if profile:
+                stats = self.preprocess_stats.setdefault(profile, {'pages': 0, 'seconds': 0.0})
+                stats['pages'] += 1
+                stats['seconds'] += page.get('preprocess_seconds', 0.0)
             
-            extracted_texts = []
+            if 'cache_hit' in page:
+                self.cache_stats['hits' if page['cache_hit'] else 'misses'] += 1
             
-            for i, image in enumerate(images):
-                logger.info(f"Processing page {i+1}/{len(images)}")
-                page_text = self.extract_text_from_image(image)
-                if page_text.strip():
-                    extracted_texts.append(page_text)
+            if page.get('dpi'):
+                self.dpi_stats['pages'] += 1
+                self.dpi_stats['escalations'] += int(page.get('escalated', False))
+                by_dpi = self.dpi_stats['pages_by_dpi']
+                by_dpi[page['dpi']] = by_dpi.get(page['dpi'], 0) + 1
+    
+    def get_preprocess_stats(self) -> Dict[str, Dict[str, float]]:
+        """Pages and preprocessing time per profile since this service was created."""
+        return {
+            profile: {
+                'pages': stats['pages'],
+                'seconds': round(stats['seconds'], 4),
+                'avg_ms_per_page': round(1000 * stats['seconds'] / stats['pages'], 2) if stats['pages'] else 0.0
+            }
+            for profile, stats in self.preprocess_stats.items()
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """OCR counters for worker heartbeats and model reports."""
+        return {
+            'preprocess': self.get_preprocess_stats(),
+            'dpi': self.get_dpi_stats(),
+            'page_cache': self.get_cache_stats()
+        }
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Page cache hits and misses for pages OCR'd by this service, including pool workers."""
+        lookups = self.cache_stats['hits'] + self.cache_stats['misses']
+        return {
+            'enabled': self.page_cache is not None,
+            'backend': self.page_cache.backend if self.page_cache else None,
+            'hits': self.cache_stats['hits'],
+            'misses': self.cache_stats['misses'],
+            'hit_rate': round(self.cache_stats['hits'] / lookups, 4) if lookups else 0.0
+        }
+    
+    def get_dpi_stats(self) -> Dict[str, Any]:
+        """Escalation counts and final DPI distribution, for tuning ocr_min_confidence."""
+        pages = self.dpi_stats['pages']
+        return {
+            'pages': pages,
+            'escalations': self.dpi_stats['escalations'],
+            'escalation_rate': round(self.dpi_stats['escalations'] / pages, 4) if pages else 0.0,
+            'pages_by_dpi': dict(self.dpi_stats['pages_by_dpi']),
+            'initial_dpi': self.render_dpi,
+            'max_dpi': self.dpi,
+            'min_confidence': self.min_confidence
+        }
+    
+    def extract_text_from_pdf(self, pdf_path: str, parallel: Optional[bool] = None,
+                              profile: Optional[str] = None) -> str:
+        try:
+            page_results = self.ocr_pdf_pages(pdf_path, parallel=parallel, profile=profile)
             
+            extracted_texts = [page['text'] for page in page_results if page['text'].strip()]
             full_text = "\n\n".join(extracted_texts)
             
-            logger.info(f"Successfully extracted text from {len(images)} pages")
+            logger.info(f"Successfully extracted text from {len(page_results)} pages")
             return full_text
             
         except Exception as e:
             logger.error(f"PDF OCR extraction failed: {e}")
             return ""
     
+    def ocr_pdf_pages(self, pdf_path: str, page_numbers: Optional[List[int]] = None,
+                      parallel: Optional[bool] = None, profile: Optional[str] = None) -> List[Dict[str, Any]]:
+        """OCR the given 1-based pages (all pages by default), returned in page order.
+        
+        ``profile`` overrides the configured preprocessing profile, e.g. per tenant.
+        """
+        if page_numbers is None:
+            page_numbers = list(range(1, self.get_page_count(pdf_path) + 1))
+        if not page_numbers:
+            return []
+        
+        if parallel is None:
+            parallel = settings.ocr_parallel
+        
+        profile = profile or self.preprocess_profile
+        
+        page_results = None
+        if parallel and len(page_numbers) > 1:
+            try:
+                page_results = self._ocr_pages_parallel(pdf_path, page_numbers, profile)
+            except Exception as e:
+                logger.warning(f"Parallel OCR unavailable, falling back to sequential: {e}")
+        
+        if page_results is None:
+            page_results = self._ocr_pages_sequential(pdf_path, page_numbers, profile)
+        
+        self._record_page_stats(page_results)
+        return page_results
+    
+    def _ocr_pages_sequential(self, pdf_path: str, page_numbers: List[int],
+                              profile: str) -> List[Dict[str, Any]]:
+        page_results = []
+        for page_number, image in self._iter_page_images(pdf_path, page_numbers):
+            logger.info(f"Processing page {page_number}/{page_numbers[-1]}")
+            started = time.perf_counter()
+            ocr_result = self._ocr_rendered_page(pdf_path, page_number, image, profile)
+            image.close()
+            page_results.append({
+                'page': page_number,
+                'seconds': time.perf_counter() - started,
+                'status': 'ok',
+                **ocr_result
+            })
+        
+        return page_results
+    
+    def _iter_page_images(self, pdf_path: str, page_numbers: List[int]) -> Iterator[Tuple[int, Image.Image]]:
+        """Render pages a window at a time so peak memory tracks the window, not the page count."""
+        for window in self._page_windows(page_numbers, self.render_window):
+            images = pdf2image.convert_from_path(
+                pdf_path,
+                dpi=self.render_dpi,
+                fmt='PNG',
+                first_page=window[0],
+                last_page=window[-1]
+            )
+            rendered = dict(zip(range(window[0], window[-1] + 1), images))
+            del images
+            
+            for page_number in window:
+                image = rendered.pop(page_number, None)
+                if image is not None:
+                    yield page_number, image
+            
+            for image in rendered.values():
+                image.close()
+    
+    @staticmethod
+    def _page_windows(page_numbers: List[int], window_size: int) -> List[List[int]]:
+        """Group sorted page numbers into contiguous runs of at most window_size pages."""
+        windows = []
+        for page_number in sorted(page_numbers):
+            current = windows[-1] if windows else None
+            if current and page_number == current[-1] + 1 and len(current) < window_size:
+                current.append(page_number)
+            else:
+                windows.append([page_number])
+        return windows
+    
+    def _ocr_pages_parallel(self, pdf_path: str, page_numbers: List[int],
+                            profile: str) -> List[Dict[str, Any]]:
+        results: Dict[int, Dict[str, Any]] = {}
+        pending = list(page_numbers)
+        while pending:
+            pending = self._run_page_pool(pdf_path, pending, profile, results)
+        return [results[page_number] for page_number in page_numbers]
+    
+    def _run_page_pool(self, pdf_path: str, page_numbers: List[int], profile: str,
+                       results: Dict[int, Dict[str, Any]]) -> List[int]:
+        """OCR pages in a fresh pool, filling ``results``; returns pages still to do.
+        
+        A page that times out is still running in its worker and would hold that
+        slot indefinitely, so the whole pool is killed and the pages that had not
+        finished are returned to be resubmitted to a new pool.
+        """
+        max_workers = min(self.max_workers, len(page_numbers))
+        logger.info(f"OCR of {len(page_numbers)} pages across {max_workers} worker processes")
+        
+        # Spawned workers render their own page, so no page images cross process
+        # boundaries and the (possibly model-laden) parent is never forked.
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+        try:
+            futures = {
+                page_number: executor.submit(_ocr_pdf_page, pdf_path, page_number, profile)
+                for page_number in page_numbers
+            }
+            
+            for page_number, future in futures.items():
+                try:
+                    results[page_number] = future.result(timeout=self.page_timeout)
+                except FutureTimeoutError:
+                    logger.error(f"OCR timed out on page {page_number} after {self.page_timeout}s")
+                    results[page_number] = {
+                        'page': page_number,
+                        'text': '',
+                        'seconds': float(self.page_timeout),
+                        'status': 'timeout'
+                    }
+                    unfinished = []
+                    for other_page, other in futures.items():
+                        if other_page in results:
+                            continue
+                        if other.done() and other.exception() is None:
+                            results[other_page] = other.result()
+                        else:
+                            unfinished.append(other_page)
+                    self._terminate_pool(executor)
+                    return unfinished
+                except Exception as e:
+                    logger.error(f"OCR failed on page {page_number}: {e}")
+                    results[page_number] = {
+                        'page': page_number,
+                        'text': '',
+                        'seconds': 0.0,
+                        'status': 'failed'
+                    }
+            
+            return []
+            
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+    
+    @staticmethod
+    def _terminate_pool(executor: ProcessPoolExecutor):
+        """Kill pool workers, including ones stuck inside Tesseract."""
+        terminate_workers = getattr(executor, "terminate_workers", None)
+        if terminate_workers is not None:
+            terminate_workers()
+            return
+        # Before Python 3.14 there is no public API for killing busy workers;
+        # shutdown() drops the process table, so read it first
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+    
+    def ocr_pdf_page(self, pdf_path: str, page_number: int, profile: Optional[str] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        image = self._render_page(pdf_path, page_number, self.render_dpi)
+        ocr_result = {'text': ''}
+        if image is not None:
+            ocr_result = self._ocr_rendered_page(pdf_path, page_number, image, profile)
+            image.close()
+        
+        return {
+            'page': page_number,
+            'seconds': time.perf_counter() - started,
+            'status': 'ok',
+            **ocr_result
+        }
+    
+    def get_page_count(self, pdf_path: str) -> int:
+        try:
+            return int(pdf2image.pdfinfo_from_path(pdf_path).get('Pages', 0))
+        except Exception as e:
+            logger.error(f"Failed to read PDF page count: {e}")
+            return 0
+    
     def is_scanned_pdf(self, pdf_path: str) -> bool:
         try:
             images = pdf2image.convert_from_path(pdf_path, first_page=1, last_page=1, dpi=150)
@@ -0,0 +1,70 @@
+from PIL import Image
+from cryptography.fernet import Fernet, InvalidToken
+from typing import Dict, Any, Optional
+import base64
+import hashlib
+import json
+import logging
+from app.core.config import settings
+from app.utils.lru_store import DiskLRUStore, RedisLRUStore
+
+logger = logging.getLogger(__name__)
+
+
+class PageCacheService:
+    """Maps the content hash of a rendered page to its OCR result.
+
+    Entries hold OCR text, so they are encrypted with a key derived from the
+    application secret before they reach disk or Redis.
+    """
+
+    def __init__(self, backend: Optional[str] = None):
+        self.backend = backend or settings.ocr_cache_backend
+        self.max_entries = settings.ocr_cache_max_entries
+        self.store = None
+        self._cipher = Fernet(base64.urlsafe_b64encode(
+            hashlib.sha256(f"ocr-page-cache:{settings.secret_key}".encode()).digest()
+        ))
+        self._initialize_store()
+
+    def _initialize_store(self):
+        try:
+            if self.backend == "redis":
+                from app.utils.redis_client import get_redis_client
+                self.store = RedisLRUStore(get_redis_client(), "anonora:ocr:page", self.max_entries)
+            else:
+                self.store = DiskLRUStore(settings.ocr_cache_dir, self.max_entries)
+        except Exception as e:
+            logger.error(f"Failed to initialize OCR page cache: {e}")
+            self.store = None
+
+    def make_key(self, image: Image.Image, ocr_config: str) -> str:
+        digest = hashlib.blake2b(digest_size=32)
+        digest.update(ocr_config.encode())
+        digest.update(f"{image.mode}:{image.size}".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.store is None:
+            return None
+        try:
+            token = self.store.get(key)
+            if token is None:
+                return None
+            return json.loads(self._cipher.decrypt(token.encode()))
+        except InvalidToken:
+            logger.warning("Discarding OCR cache entry encrypted with a different key")
+            return None
+        except Exception as e:
+            logger.error(f"OCR page cache lookup failed: {e}")
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]):
+        if self.store is None:
+            return
+        try:
+            token = self._cipher.encrypt(json.dumps(value).encode()).decode()
+            self.store.set(key, token)
+        except Exception as e:
+            logger.error(f"OCR page cache write failed: {e}")
@@ -1,12 +1,13 @@
 import PyPDF2 #
 import pdfplumber
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import logging
 import os
+import time
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-
 class PDFService:
     def __init__(self):
         self.extractors = {
@@ -35,6 +36,53 @@ class PDFService:
             logger.error(f"PDF text extraction failed: {e}")
             return ""
     
+    def extract_pages(self, pdf_path: str) -> List[Dict[str, Any]]:
+        """Extract the text layer page by page, with per-page timings."""
+        pages = self._extract_pages_with_pdfplumber(pdf_path)
+        if pages is None:
+            pages = self._extract_pages_with_pypdf2(pdf_path)
+        return pages or []
+    
+    def _extract_pages_with_pdfplumber(self, pdf_path: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            with pdfplumber.open(pdf_path) as pdf:
+                pages = []
+                for i, page in enumerate(pdf.pages):
+                    started = time.perf_counter()
+                    text = page.extract_text() or ""
+                    pages.append({
+                        'page': i + 1,
+                        'text': text,
+                        'seconds': time.perf_counter() - started
+                    })
+                
+                return pages
+                
+        except Exception as e:
+            logger.error(f"pdfplumber page extraction failed: {e}")
+            return None
+    
+    def _extract_pages_with_pypdf2(self, pdf_path: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            with open(pdf_path, 'rb') as file:
+                pdf_reader = PyPDF2.PdfReader(file)
+                pages = []
+                
+                for i, page in enumerate(pdf_reader.pages):
+                    started = time.perf_counter()
+                    text = page.extract_text() or ""
+                    pages.append({
+                        'page': i + 1,
+                        'text': text,
+                        'seconds': time.perf_counter() - started
+                    })
+                
+                return pages
+                
+        except Exception as e:
+            logger.error(f"PyPDF2 page extraction failed: {e}")
+            return None
+    
     def _extract_with_pdfplumber(self, pdf_path: str) -> str:
         try:
             with pdfplumber.open(pdf_path) as pdf:
@@ -119,9 +167,12 @@ class PDFService:
             return {}
     
     def is_digital_pdf(self, pdf_path: str) -> bool:
+        """True when any page has a text layer that per-page routing would use instead of OCR."""
         try:
-            text = self.extract_text_from_pdf(pdf_path)
-            return len(text.strip()) > 50
+            return any(self.has_page_text_layer(page['text']) for page in self.extract_pages(pdf_path))
         except Exception as e:
             logger.error(f"Failed to determine PDF type: {e}")
-            return False 
\ No newline at end of file
+            return False
+    
+    def has_page_text_layer(self, text: str) -> bool:
+        return len(text.strip()) >= settings.page_text_min_length
@@ -0,0 +1,229 @@
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+import logging
+import threading
+import time
+from app.core.config import settings
+from app.core.database import db_manager
+from app.models.document import DocumentStatus
+from app.utils.redis_client import get_redis_client
+from app.utils.vector_search import ExactVectorIndex, HnswVectorIndex, hnswlib
+
+logger = logging.getLogger(__name__)
+
+SEARCH_INDEX_VERSION_PREFIX = "anonora:search:index_version"
+
+INDEX_COLUMNS = "id, title, description, tags, created_at, vector_embedding"
+CHUNK_INDEX_COLUMNS = "id, document_id, embedding"
+FETCH_PAGE_SIZE = 1000
+# Nearest vectors fetched per requested document; one document can own several
+CHUNK_CANDIDATES = 5
+
+
+def invalidate_search_indexes(user_ids: Iterable[Any]):
+    """Bump the index version of each user so every API process rebuilds on next search."""
+    try:
+        redis_client = get_redis_client()
+        for user_id in {str(user_id) for user_id in user_ids if user_id}:
+            redis_client.incr(f"{SEARCH_INDEX_VERSION_PREFIX}:{user_id}")
+    except Exception as e:
+        logger.warning(f"Failed to invalidate search indexes: {e}")
+
+
+def document_sharee_ids(supabase, document_id: str) -> List[str]:
+    """Users a document is shared with."""
+    shares = supabase.table("document_shares").select("shared_with_user_id").eq(
+        "document_id", document_id
+    ).execute()
+    return [share["shared_with_user_id"] for share in shares.data or []]
+
+
+def invalidate_document_search_indexes(supabase, document_id: str, owner_id: Optional[str] = None):
+    """Invalidate the indexes of everyone who can see a document: its owner and sharees."""
+    try:
+        if owner_id is None:
+            result = supabase.table("documents").select("owner_id").eq("id", document_id).execute()
+            owner_id = result.data[0]["owner_id"] if result.data else None
+        invalidate_search_indexes([owner_id] + document_sharee_ids(supabase, document_id))
+    except Exception as e:
+        logger.warning(f"Failed to invalidate search indexes for document {document_id}: {e}")
+
+
+class _IndexEntry:
+    def __init__(self, version: str, index, documents: Dict[str, Dict[str, Any]]):
+        self.version = version
+        self.index = index
+        self.documents = documents
+        self.nbytes = index.nbytes
+
+
+class SearchIndexCache:
+    """Per-user in-memory vector index over the documents the user can access.
+
+    The index holds each document's embedding and its chunk embeddings, all
+    labelled with the document id; a document scores as its best vector.
+
+    Indexes are rebuilt lazily when the user's version counter in Redis moves,
+    which processing, sharing, updates and deletes bump. Entries are evicted
+    least recently used first once their combined size exceeds the budget.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or settings.search_index_cache_max_mb * 1024 * 1024
+        self._entries: "OrderedDict[str, _IndexEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def search(self, user_id: str, query_embedding: List[float], k: int,
+               threshold: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """Rows shaped like match_accessible_documents output, or None to fall back to SQL."""
+        try:
+            entry = self._get_entry(str(user_id))
+            matches = {}
+            for document_id, similarity in entry.index.search(query_embedding, k * CHUNK_CANDIDATES, threshold):
+                if document_id not in matches:
+                    matches[document_id] = dict(entry.documents[document_id], similarity=similarity)
+                    if len(matches) == k:
+                        break
+            return list(matches.values())
+        except Exception as e:
+            logger.warning(f"Search index unavailable for {user_id}, falling back to SQL: {e}")
+            return None
+
+    def _get_entry(self, user_id: str) -> _IndexEntry:
+        version = get_redis_client().get(f"{SEARCH_INDEX_VERSION_PREFIX}:{user_id}") or "0"
+
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry
+            build_lock = self._build_locks.setdefault(user_id, threading.Lock())
+
+        with build_lock:
+            with self._lock:
+                entry = self._entries.get(user_id)
+                if entry is not None and entry.version == version:
+                    return entry
+
+            # The version is read before the rows, so a change made while
+            # building leaves this entry stale and triggers another rebuild.
+            entry = self._build(user_id, version)
+
+            with self._lock:
+                self._entries[user_id] = entry
+                self._entries.move_to_end(user_id)
+                self._evict()
+            return entry
+
+    def _build(self, user_id: str, version: str) -> _IndexEntry:
+        started = time.perf_counter()
+        rows = self._fetch_accessible_rows(user_id)
+        chunks = self._fetch_chunk_rows([str(row["id"]) for row in rows])
+
+        ids = [str(row["id"]) for row in rows] + [str(chunk["document_id"]) for chunk in chunks]
+        embeddings = [row.get("vector_embedding") for row in rows] + [chunk["embedding"] for chunk in chunks]
+        if hnswlib is not None and len(ids) >= settings.search_index_hnsw_min_documents:
+            index = HnswVectorIndex(
+                ids, embeddings, settings.vector_dimension,
+                m=settings.search_index_hnsw_m,
+                ef_construction=settings.search_index_hnsw_ef_construction,
+                ef_search=settings.search_index_hnsw_ef_search
+            )
+        else:
+            index = ExactVectorIndex(ids, embeddings, settings.vector_dimension)
+
+        documents = {
+            str(row["id"]): {key: row.get(key) for key in ("id", "title", "description", "tags", "created_at")}
+            for row in rows
+        }
+        self.builds += 1
+        logger.info(f"Built {type(index).__name__} for user {user_id}: {len(rows)} documents, "
+                    f"{len(index)} vectors, {index.nbytes / (1024 * 1024):.1f} MB in {time.perf_counter() - started:.2f}s")
+        return _IndexEntry(version, index, documents)
+
+    def _fetch_accessible_rows(self, user_id: str) -> List[Dict[str, Any]]:
+        supabase = db_manager.get_supabase()
+        rows = self._fetch_pages(
+            lambda: supabase.table("documents").select(INDEX_COLUMNS).eq("owner_id", user_id)
+        )
+
+        shares = supabase.table("document_shares").select("document_id").eq(
+            "shared_with_user_id", user_id
+        ).execute()
+        shared_ids = sorted({str(share["document_id"]) for share in shares.data or []})
+        for start in range(0, len(shared_ids), FETCH_PAGE_SIZE):
+            batch = shared_ids[start:start + FETCH_PAGE_SIZE]
+            rows.extend(self._fetch_pages(
+                lambda: supabase.table("documents").select(INDEX_COLUMNS).in_("id", batch)
+            ))
+
+        seen = set()
+        unique_rows = []
+        for row in rows:
+            if str(row["id"]) not in seen:
+                seen.add(str(row["id"]))
+                unique_rows.append(row)
+        return unique_rows
+
+    def _fetch_chunk_rows(self, document_ids: List[str]) -> List[Dict[str, Any]]:
+        supabase = db_manager.get_supabase()
+        chunks = []
+        for start in range(0, len(document_ids), FETCH_PAGE_SIZE):
+            batch = document_ids[start:start + FETCH_PAGE_SIZE]
+            chunks.extend(self._fetch_pages(
+                lambda: supabase.table("document_chunks").select(CHUNK_INDEX_COLUMNS).in_("document_id", batch),
+                embedding_column="embedding", completed_only=False
+            ))
+        return chunks
+
+    def _fetch_pages(self, make_query, embedding_column: str = "vector_embedding",
+                     completed_only: bool = True) -> List[Dict[str, Any]]:
+        rows = []
+        offset = 0
+        while True:
+            query = make_query()
+            if completed_only:
+                query = query.eq("status", DocumentStatus.COMPLETED.value)
+            page = query.order("id").range(
+                offset, offset + FETCH_PAGE_SIZE - 1
+            ).execute().data or []
+            rows.extend(row for row in page if row.get(embedding_column))
+            if len(page) < FETCH_PAGE_SIZE:
+                return rows
+            offset += FETCH_PAGE_SIZE
+
+    def _evict(self):
+        total = sum(entry.nbytes for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            user_id, entry = self._entries.popitem(last=False)
+            self._drop_build_lock(user_id)
+            total -= entry.nbytes
+            self.evictions += 1
+            logger.info(f"Evicted search index for user {user_id} ({entry.nbytes} bytes)")
+
+    def _drop_build_lock(self, user_id: str):
+        """Forget an evicted user's build lock unless a build is holding it right now."""
+        build_lock = self._build_locks.get(user_id)
+        if build_lock is not None and not build_lock.locked():
+            del self._build_locks[user_id]
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'enabled': settings.search_index_cache_enabled,
+                'backend': "hnswlib" if hnswlib is not None else "exact",
+                'users': len(self._entries),
+                'bytes': sum(entry.nbytes for entry in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'builds': self.builds,
+                'evictions': self.evictions
+            }
+
+
+search_index_cache = SearchIndexCache()
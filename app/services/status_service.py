@@ -0,0 +1,169 @@
+from typing import Callable, Dict, Any, Optional, List
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import datetime
+from app.core.config import settings
+from app.services.analysis_cache_service import analysis_cache
+from app.services.model_registry import model_registry
+from app.utils.process_memory import get_memory_breakdown
+from app.utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+WORKER_HEARTBEAT_PREFIX = "anonora:worker:heartbeat"
+
+
+class WorkerHeartbeat:
+    """Publishes a worker process's liveness and model readiness to Redis.
+
+    Each entry expires after a few missed beats, so a dead worker disappears
+    from /status without anyone having to broadcast to the workers.
+    """
+
+    def __init__(self, interval: Optional[int] = None,
+                 ocr_stats: Optional[Callable[[], Dict[str, Any]]] = None):
+        self.interval = interval or settings.worker_heartbeat_interval
+        self.ocr_stats = ocr_stats
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="worker-heartbeat", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            self.publish()
+            time.sleep(self.interval)
+
+    def publish(self):
+        try:
+            payload = {
+                'worker_id': self.worker_id,
+                'timestamp': time.time(),
+                'models': model_registry.report(),
+                'memory': get_memory_breakdown(),
+                'analysis_cache': analysis_cache.get_stats(),
+                'ocr': self.ocr_stats() if self.ocr_stats else {}
+            }
+            get_redis_client().set(
+                f"{WORKER_HEARTBEAT_PREFIX}:{self.worker_id}",
+                json.dumps(payload),
+                ex=self.interval * 3
+            )
+        except Exception as e:
+            logger.warning(f"Failed to publish worker heartbeat: {e}")
+
+
+class StatusService:
+    """Serves /status from a snapshot that a background task keeps fresh.
+
+    Requests never touch Redis or Celery; they read the last snapshot plus this
+    process's model registry, so probes answer in well under a millisecond.
+    """
+
+    def __init__(self, refresh_interval: Optional[int] = None):
+        self.refresh_interval = refresh_interval or settings.status_refresh_interval
+        self._snapshot: Dict[str, Any] = {
+            'redis': 'unknown',
+            'celery_worker': 'unknown',
+            'workers': [],
+            'checked_at': None
+        }
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _refresh_loop(self):
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_interval)
+
+    async def refresh(self):
+        try:
+            self._snapshot = await asyncio.to_thread(self._collect)
+        except Exception as e:
+            logger.error(f"Status refresh failed: {e}")
+
+    def _collect(self) -> Dict[str, Any]:
+        redis_status = "disconnected"
+        workers: List[Dict[str, Any]] = []
+        try:
+            redis_client = get_redis_client()
+            if redis_client.ping():
+                redis_status = "connected"
+                keys = list(redis_client.scan_iter(match=f"{WORKER_HEARTBEAT_PREFIX}:*", count=100))
+                for value in redis_client.mget(keys) if keys else []:
+                    if value:
+                        workers.append(self._summarize_worker(json.loads(value)))
+        except Exception as e:
+            logger.warning(f"Failed to read worker heartbeats: {e}")
+
+        if redis_status != "connected":
+            worker_status = "unknown"
+        else:
+            worker_status = "running" if workers else "not running"
+
+        return {
+            'redis': redis_status,
+            'celery_worker': worker_status,
+            'workers': workers,
+            'checked_at': datetime.utcnow().isoformat()
+        }
+
+    def _summarize_worker(self, heartbeat: Dict[str, Any]) -> Dict[str, Any]:
+        models = heartbeat.get('models', {})
+        return {
+            'worker_id': heartbeat.get('worker_id'),
+            'last_seen_seconds': round(time.time() - heartbeat.get('timestamp', 0), 1),
+            'models_ready': bool(models) and all(stats.get('loaded') for stats in models.values()),
+            'models': models,
+            'memory': heartbeat.get('memory', {}),
+            'analysis_cache': heartbeat.get('analysis_cache', {}),
+            'ocr': heartbeat.get('ocr', {})
+        }
+
+    def _model_ready(self, name: str, models: Dict[str, Any], workers: List[Dict[str, Any]]) -> bool:
+        """A model is ready when this process or any live worker has it loaded."""
+        if models.get(name, {}).get('loaded', False):
+            return True
+        return any(worker['models'].get(name, {}).get('loaded', False) for worker in workers)
+
+    def get_status(self) -> Dict[str, Any]:
+        models = model_registry.report()
+        snapshot = self._snapshot
+        workers = snapshot['workers']
+        return {
+            'status': "degraded" if snapshot['redis'] == "disconnected" else "operational",
+            'timestamp': datetime.utcnow().isoformat(),
+            'version': settings.app_version,
+            'services': {
+                'ocr_service': True,
+                'pdf_service': True,
+                'anonymization_service': self._model_ready('anonymization', models, workers),
+                'embedding_service': self._model_ready('embedding', models, workers),
+                'tagging_service': self._model_ready('tagging', models, workers)
+            },
+            'models': models,
+            'redis': snapshot['redis'],
+            'celery_worker': snapshot['celery_worker'],
+            'workers': workers,
+            'checked_at': snapshot['checked_at']
+        }
+
+
+status_service = StatusService()
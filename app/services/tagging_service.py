@@ -85,6 +85,9 @@ class TaggingService:
                 'top_score': 0.0
             }
     
+    def share_memory(self):
+        self.classifier.model.share_memory()
+    
     def suggest_tags(self, text: str, max_tags: int = 5, confidence_threshold: float = 0.3) -> List[str]:
         try:
             classification = self.classify_document(text)
@@ -0,0 +1,130 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# DiskLRUStore lets the directory grow this fraction past max_entries before
+# scanning it, so the O(n) scan runs once per that many writes, not per write
+DISK_EVICTION_HEADROOM = 0.1
+
+
+class LocalLRUStore:
+    """In-process string store bounded by entry count."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DiskLRUStore:
+    """One file per key in a directory; file mtime tracks recency for eviction.
+
+    Shared by every process on the host that points at the same directory.
+    Each process counts the files it adds and only scans the directory once
+    the count passes a high-water mark above max_entries; the scan evicts down
+    to max_entries and resets the count to the real size.
+    """
+
+    def __init__(self, directory: str, max_entries: int):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.high_water = max_entries + max(1, int(max_entries * DISK_EVICTION_HEADROOM))
+        os.makedirs(directory, exist_ok=True)
+        self._count = len(self)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = f.read()
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: str):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(value)
+        is_new = not os.path.exists(path)
+        os.replace(tmp_path, path)
+        if is_new:
+            self._count += 1
+            if self._count > self.high_water:
+                self._evict()
+
+    def _evict(self):
+        entries = [entry for entry in os.scandir(self.directory) if not entry.name.endswith('.tmp')]
+        excess = len(entries) - self.max_entries
+        if excess > 0:
+            entries.sort(key=lambda entry: entry.stat().st_mtime)
+            for entry in entries[:excess]:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        self._count = len(entries) - max(excess, 0)
+
+    def __len__(self) -> int:
+        return sum(1 for entry in os.scandir(self.directory) if not entry.name.endswith('.tmp'))
+
+
+class RedisLRUStore:
+    """Redis-backed store; a sorted set of last-access times bounds it to max_entries."""
+
+    def __init__(self, redis_client, namespace: str, max_entries: int):
+        self.redis = redis_client
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.index_key = f"{namespace}:lru"
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.redis.get(self._key(key))
+        if value is not None:
+            self.redis.zadd(self.index_key, {key: time.time()})
+        return value
+
+    def set(self, key: str, value: str):
+        pipe = self.redis.pipeline()
+        pipe.set(self._key(key), value)
+        pipe.zadd(self.index_key, {key: time.time()})
+        pipe.zcard(self.index_key)
+        size = pipe.execute()[-1]
+
+        excess = size - self.max_entries
+        if excess > 0:
+            evicted = [member for member, _ in self.redis.zpopmin(self.index_key, excess)]
+            if evicted:
+                self.redis.delete(*[self._key(member) for member in evicted])
+
+    def __len__(self) -> int:
+        return self.redis.zcard(self.index_key)
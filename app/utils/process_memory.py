@@ -0,0 +1,43 @@
+from typing import Dict
+import os
+import resource
+import sys
+
+MB = 1024 * 1024
+
+
+def get_rss_bytes() -> int:
+    """Current resident set size of this process."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # No procfs (macOS): fall back to peak RSS, reported in bytes there and KiB on Linux
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def get_memory_breakdown() -> Dict[str, float]:
+    """RSS split into unique (USS), proportional (PSS) and shared memory, in MB.
+
+    USS is what the process would free on exit, so it is the number to watch
+    when forked workers share model pages copy-on-write. Only RSS is available
+    without /proc/self/smaps_rollup (Linux 4.14+).
+    """
+    try:
+        fields = {}
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and parts[2] == "kB":
+                    fields[parts[0].rstrip(":")] = int(parts[1]) * 1024
+    except (OSError, ValueError):
+        return {'rss_mb': round(get_rss_bytes() / MB, 1)}
+
+    return {
+        'rss_mb': round(fields.get('Rss', 0) / MB, 1),
+        'pss_mb': round(fields.get('Pss', 0) / MB, 1),
+        'uss_mb': round((fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)) / MB, 1),
+        'shared_mb': round((fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)) / MB, 1)
+    }
@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Tuple
+
+PARAGRAPH_BREAK = "\n\n"
+SENTENCE_ENDINGS = (". ", "! ", "? ", ".\n", "!\n", "?\n", "\n")
+
+
+def split_text_with_overlap(text: str, chunk_size: int, overlap: int) -> List[Tuple[int, str]]:
+    """Split text into overlapping chunks, returned as (offset, chunk) pairs.
+
+    Chunks end on a paragraph break when one falls in the second half of the
+    chunk, otherwise on a sentence end, otherwise on whitespace. Each chunk after
+    the first starts roughly ``overlap`` characters before the previous chunk's
+    end, on a whitespace boundary.
+    """
+    if chunk_size <= 0 or len(text) <= chunk_size:
+        return [(0, text)]
+
+    overlap = max(0, min(overlap, chunk_size // 2))
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            end = _find_boundary(text, start + chunk_size // 2, end)
+        chunks.append((start, text[start:end]))
+        if end >= len(text):
+            break
+
+        next_start = end - overlap
+        whitespace = _find_whitespace(text, next_start, end)
+        if whitespace != -1:
+            next_start = whitespace + 1
+        start = max(next_start, start + 1)
+
+    return chunks
+
+
+def _find_boundary(text: str, lower: int, upper: int) -> int:
+    """Best cut position in text[lower:upper], or upper when there is none."""
+    position = text.rfind(PARAGRAPH_BREAK, lower, upper)
+    if position != -1:
+        return position + len(PARAGRAPH_BREAK)
+
+    best = -1
+    for ending in SENTENCE_ENDINGS:
+        position = text.rfind(ending, lower, upper)
+        if position != -1:
+            best = max(best, position + len(ending))
+    if best != -1:
+        return best
+
+    for position in range(upper - 1, lower - 1, -1):
+        if text[position].isspace():
+            return position + 1
+    return upper
+
+
+def _find_whitespace(text: str, lower: int, upper: int) -> int:
+    for position in range(max(lower, 0), upper):
+        if text[position].isspace():
+            return position
+    return -1
+
+
+def chunk_ownership(chunks: List[Tuple[int, str]]) -> List[Tuple[int, int]]:
+    """Global [start, end) range each chunk is authoritative for.
+
+    Neighbouring chunks split their overlap at its midpoint, so an entity is
+    reported by the chunk that sees at least half the overlap as context on
+    both sides of it.
+    """
+    ranges = []
+    for i, (offset, chunk) in enumerate(chunks):
+        own_start = 0 if i == 0 else ranges[-1][1]
+        if i + 1 < len(chunks):
+            next_offset = chunks[i + 1][0]
+            own_end = max((next_offset + offset + len(chunk)) // 2, own_start)
+        else:
+            own_end = offset + len(chunk)
+        ranges.append((own_start, own_end))
+    return ranges
+
+
+def merge_chunk_entities(chunks: List[Tuple[int, str]],
+                         chunk_entities: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Map per-chunk entities to global offsets and drop boundary duplicates.
+
+    ``chunk_entities[i]`` holds entities with offsets local to ``chunks[i]``.
+    An entity is kept only from the chunk that owns its start offset, so spans
+    seen truncated at one chunk's edge are replaced by the neighbour's full span.
+    """
+    merged = {}
+    for (offset, _), (own_start, own_end), entities in zip(chunks, chunk_ownership(chunks), chunk_entities):
+        for entity in entities:
+            start = entity['start'] + offset
+            if not own_start <= start < own_end:
+                continue
+
+            global_entity = dict(entity, start=start, end=entity['end'] + offset)
+            key = (global_entity['entity_type'], start, global_entity['end'])
+            if key not in merged or merged[key]['score'] < global_entity['score']:
+                merged[key] = global_entity
+
+    return sorted(merged.values(), key=lambda e: (e['start'], e['end'], e['entity_type']))
@@ -0,0 +1,171 @@
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+import struct
+import numpy as np
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+# pgvector's binary wire format: int16 dimension, int16 unused, then
+# big-endian float32 values. Also used as the compact storage format.
+_PGVECTOR_HEADER = struct.Struct(">HH")
+
+
+def encode_embedding(embedding: Sequence[float]) -> bytes:
+    vector = np.asarray(embedding, dtype=">f4")
+    return _PGVECTOR_HEADER.pack(len(vector), 0) + vector.tobytes()
+
+
+def decode_embedding(value: Any) -> Optional[np.ndarray]:
+    """Decode an embedding from a list, pgvector text ('[1,2,3]') or pgvector binary.
+
+    Returns a float32 vector, or None when the value is empty or malformed.
+    Never evaluates the input.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        if len(data) < _PGVECTOR_HEADER.size:
+            return None
+        dimension, _ = _PGVECTOR_HEADER.unpack_from(data)
+        if len(data) != _PGVECTOR_HEADER.size + 4 * dimension:
+            return None
+        return np.frombuffer(data, dtype=">f4", offset=_PGVECTOR_HEADER.size).astype(np.float32)
+    if isinstance(value, str):
+        text = value.strip()
+        if len(text) < 3 or text[0] != "[" or text[-1] != "]":
+            return None
+        try:
+            return np.array(text[1:-1].split(","), dtype=np.float32)
+        except ValueError:
+            return None
+    try:
+        vector = np.asarray(value, dtype=np.float32)
+    except (TypeError, ValueError):
+        return None
+    return vector if vector.ndim == 1 and vector.size else None
+
+
+def embedding_matrix(embeddings: Iterable[Any], dimension: Optional[int] = None) -> Tuple[np.ndarray, List[int]]:
+    """Stack decodable embeddings into one contiguous float32 matrix.
+
+    Returns the matrix and the input positions of its rows; values that fail to
+    decode or have the wrong dimension are skipped.
+    """
+    rows, positions = [], []
+    for position, value in enumerate(embeddings):
+        vector = decode_embedding(value)
+        if vector is None:
+            continue
+        if dimension is None:
+            dimension = vector.size
+        if vector.size != dimension:
+            continue
+        rows.append(vector)
+        positions.append(position)
+
+    if not rows:
+        return np.empty((0, dimension or 0), dtype=np.float32), []
+    return np.ascontiguousarray(np.vstack(rows), dtype=np.float32), positions
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """L2-normalize rows in place; all-zero rows stay zero."""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def top_k_similar(query: Any, normalized: np.ndarray, k: Optional[int] = None,
+                  threshold: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Cosine top-k against pre-normalized rows with one matmul and argpartition.
+
+    Returns (row indices, scores) sorted by descending score.
+    """
+    vector = decode_embedding(query)
+    if vector is None or normalized.shape[0] == 0 or vector.size != normalized.shape[1]:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    scores = normalized @ (vector / norm)
+
+    count = scores.shape[0] if k is None else min(k, scores.shape[0])
+    if count <= 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+    if count < scores.shape[0]:
+        candidates = np.argpartition(-scores, count - 1)[:count]
+    else:
+        candidates = np.arange(scores.shape[0])
+    order = candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    if threshold is not None:
+        order = order[scores[order] >= threshold]
+    return order, scores[order]
+
+
+class ExactVectorIndex:
+    """Normalized in-memory matrix of embeddings with brute-force cosine search."""
+
+    def __init__(self, ids: Sequence[Any], embeddings: Iterable[Any], dimension: Optional[int] = None):
+        matrix, positions = embedding_matrix(embeddings, dimension)
+        self.ids = [ids[position] for position in positions]
+        self.matrix = normalize_rows(matrix)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes
+
+    def search(self, query: Any, k: Optional[int] = None,
+               threshold: Optional[float] = None) -> List[Tuple[Any, float]]:
+        indices, scores = top_k_similar(query, self.matrix, k, threshold)
+        return [(self.ids[i], float(score)) for i, score in zip(indices, scores)]
+
+
+class HnswVectorIndex:
+    """Approximate cosine search over an hnswlib graph; same interface as ExactVectorIndex."""
+
+    def __init__(self, ids: Sequence[Any], embeddings: Iterable[Any], dimension: Optional[int] = None,
+                 m: int = 16, ef_construction: int = 200, ef_search: int = 64):
+        if hnswlib is None:
+            raise RuntimeError("hnswlib is not installed")
+        matrix, positions = embedding_matrix(embeddings, dimension)
+        self.ids = [ids[position] for position in positions]
+        self.ef_search = ef_search
+        self.dimension = matrix.shape[1]
+        self.index = hnswlib.Index(space="cosine", dim=self.dimension)
+        self.index.init_index(max_elements=max(len(self.ids), 1), M=m, ef_construction=ef_construction)
+        if self.ids:
+            self.index.add_items(normalize_rows(matrix), np.arange(len(self.ids)))
+        self.index.set_ef(ef_search)
+        # Vectors plus roughly 2*M neighbour links per node at layer 0
+        self._nbytes = len(self.ids) * (matrix.shape[1] * 4 + m * 2 * 4)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    def search(self, query: Any, k: Optional[int] = None,
+               threshold: Optional[float] = None) -> List[Tuple[Any, float]]:
+        vector = decode_embedding(query)
+        if vector is None or not self.ids or vector.size != self.dimension:
+            return []
+        count = len(self.ids) if k is None else min(k, len(self.ids))
+        if count <= 0:
+            return []
+        # ef must be at least k for hnswlib to return k results
+        self.index.set_ef(max(self.ef_search, count))
+        labels, distances = self.index.knn_query(vector, k=count)
+        results = [(self.ids[label], float(1 - distance)) for label, distance in zip(labels[0], distances[0])]
+        if threshold is not None:
+            results = [result for result in results if result[1] >= threshold]
+        return results
@@ -22,10 +22,13 @@ CREATE TABLE IF NOT EXISTS documents (
     file_path VARCHAR(500) NOT NULL,
     file_size BIGINT NOT NULL,
     original_filename VARCHAR(255) NOT NULL,
+    content_hash VARCHAR(64), -- SHA-256 of the uploaded bytes, used to skip reprocessing duplicates
     document_type VARCHAR(50) NOT NULL DEFAULT 'pdf',
     status VARCHAR(50) NOT NULL DEFAULT 'pending',
     extracted_text TEXT,
     anonymized_text TEXT,
+    pii_spans JSONB DEFAULT '[]', -- detected entity spans (type, offsets, score), without the matched text
+    analyzer_version VARCHAR(255), -- analyzer configuration that produced pii_spans
     vector_embedding vector(384), -- 384-dimensional embeddings
     metadata JSONB DEFAULT '{}',
     processing_task_id VARCHAR(255),
@@ -33,6 +36,11 @@ CREATE TABLE IF NOT EXISTS documents (
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
 
+-- Columns added after the initial schema (for existing databases)
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS pii_spans JSONB DEFAULT '[]';
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS analyzer_version VARCHAR(255);
+
 -- Document shares table for access control
 CREATE TABLE IF NOT EXISTS document_shares (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -44,6 +52,20 @@ CREATE TABLE IF NOT EXISTS document_shares (
     UNIQUE(document_id, shared_with_user_id)
 );
 
+-- Chunk embeddings: the model reads only the first ~256 tokens of its input,
+-- so long documents are embedded as overlapping chunks of anonymized text
+CREATE TABLE IF NOT EXISTS document_chunks (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    document_id UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    chunk_index INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    start_pos INTEGER NOT NULL,
+    end_pos INTEGER NOT NULL,
+    embedding vector(384) NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    UNIQUE(document_id, chunk_index)
+);
+
 -- Audit logs table
 CREATE TABLE IF NOT EXISTS audit_logs (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -73,6 +95,9 @@ CREATE TABLE IF NOT EXISTS document_processing_tasks (
 CREATE INDEX IF NOT EXISTS idx_documents_owner_id ON documents(owner_id);
 CREATE INDEX IF NOT EXISTS idx_documents_status ON documents(status);
 CREATE INDEX IF NOT EXISTS idx_documents_created_at ON documents(created_at);
+DROP INDEX IF EXISTS idx_documents_content_hash;
+CREATE INDEX IF NOT EXISTS idx_documents_owner_content_hash ON documents(owner_id, content_hash, status);
+CREATE INDEX IF NOT EXISTS idx_document_chunks_document_id ON document_chunks(document_id);
 CREATE INDEX IF NOT EXISTS idx_document_shares_document_id ON document_shares(document_id);
 CREATE INDEX IF NOT EXISTS idx_document_shares_shared_with_user_id ON document_shares(shared_with_user_id);
 CREATE INDEX IF NOT EXISTS idx_audit_logs_user_id ON audit_logs(user_id);
@@ -80,8 +105,12 @@ CREATE INDEX IF NOT EXISTS idx_audit_logs_created_at ON audit_logs(created_at);
 CREATE INDEX IF NOT EXISTS idx_document_processing_tasks_document_id ON document_processing_tasks(document_id);
 CREATE INDEX IF NOT EXISTS idx_document_processing_tasks_status ON document_processing_tasks(status);
 
--- Create vector index for similarity search
-CREATE INDEX IF NOT EXISTS idx_documents_vector_embedding ON documents USING ivfflat (vector_embedding vector_cosine_ops) WITH (lists = 100);
+-- Create vector index for similarity search. HNSW needs no training, so unlike
+-- ivfflat it keeps its recall when built on an empty table that grows later.
+-- Rebuild or re-tune with scripts/vector_index.py.
+DROP INDEX IF EXISTS idx_documents_vector_embedding;
+CREATE INDEX IF NOT EXISTS idx_documents_vector_embedding_hnsw ON documents USING hnsw (vector_embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
+CREATE INDEX IF NOT EXISTS idx_document_chunks_embedding_hnsw ON document_chunks USING hnsw (embedding vector_cosine_ops) WITH (m = 16, ef_construction = 64);
 
 -- Create full-text search index
 CREATE INDEX IF NOT EXISTS idx_documents_text_search ON documents USING gin(to_tsvector('english', title || ' ' || COALESCE(description, '') || ' ' || COALESCE(extracted_text, '')));
@@ -129,6 +158,335 @@ BEGIN
 END;
 $$;
 
+-- Top-k similarity search over the documents a user owns or has been shared.
+-- Nearest accessible documents, each scored by its best vector: the document
+-- embedding (which the model truncates to the opening of the text) or any of
+-- its chunk embeddings. Chunks are over-fetched because one document can own
+-- several of the nearest. With exact = false the vector indexes drive both
+-- scans and the access checks filter the candidates they yield. With
+-- exact = true, "+ 0" stops the distance from matching an index, so every
+-- accessible row is scored.
+CREATE OR REPLACE FUNCTION nearest_accessible_documents(
+    query_embedding vector(384),
+    user_uuid UUID,
+    match_count int,
+    chunk_count int,
+    filter_document_ids UUID[],
+    exact boolean
+)
+RETURNS TABLE (
+    document_id UUID,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY EXECUTE format($query$
+        WITH nearest AS (
+            (
+                SELECT d.id AS document_id, 1 - (d.vector_embedding <=> $1) AS similarity
+                FROM documents d
+                WHERE d.vector_embedding IS NOT NULL
+                AND d.status = 'completed'
+                AND ($4 IS NULL OR d.id = ANY($4))
+                AND (
+                    d.owner_id = $2
+                    OR EXISTS (
+                        SELECT 1 FROM document_shares ds
+                        WHERE ds.document_id = d.id
+                        AND ds.shared_with_user_id = $2
+                    )
+                )
+                ORDER BY (d.vector_embedding <=> $1)%1$s
+                LIMIT $3
+            )
+            UNION ALL
+            (
+                SELECT c.document_id, 1 - (c.embedding <=> $1) AS similarity
+                FROM document_chunks c
+                JOIN documents d ON d.id = c.document_id
+                WHERE d.status = 'completed'
+                AND ($4 IS NULL OR d.id = ANY($4))
+                AND (
+                    d.owner_id = $2
+                    OR EXISTS (
+                        SELECT 1 FROM document_shares ds
+                        WHERE ds.document_id = d.id
+                        AND ds.shared_with_user_id = $2
+                    )
+                )
+                ORDER BY (c.embedding <=> $1)%1$s
+                LIMIT $5
+            )
+        )
+        SELECT nearest.document_id, MAX(nearest.similarity)::float
+        FROM nearest
+        GROUP BY nearest.document_id
+    $query$, CASE WHEN exact THEN ' + 0' ELSE '' END)
+    USING query_embedding, user_uuid, match_count, filter_document_ids, chunk_count;
+END;
+$$;
+
+-- Nearest accessible chunks; index-driven or exact like nearest_accessible_documents
+CREATE OR REPLACE FUNCTION nearest_accessible_chunks(
+    query_embedding vector(384),
+    user_uuid UUID,
+    match_count int,
+    filter_document_ids UUID[],
+    exact boolean
+)
+RETURNS TABLE (
+    chunk_id UUID,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY EXECUTE format($query$
+        SELECT c.id, 1 - (c.embedding <=> $1)
+        FROM document_chunks c
+        JOIN documents d ON d.id = c.document_id
+        WHERE d.status = 'completed'
+        AND ($4 IS NULL OR d.id = ANY($4))
+        AND (
+            d.owner_id = $2
+            OR EXISTS (
+                SELECT 1 FROM document_shares ds
+                WHERE ds.document_id = d.id
+                AND ds.shared_with_user_id = $2
+            )
+        )
+        ORDER BY (c.embedding <=> $1)%1$s
+        LIMIT $3
+    $query$, CASE WHEN exact THEN ' + 0' ELSE '' END)
+    USING query_embedding, user_uuid, match_count, filter_document_ids;
+END;
+$$;
+
+-- Completed documents the user can access, counted up to limit_count
+CREATE OR REPLACE FUNCTION count_accessible_documents(
+    user_uuid UUID,
+    filter_document_ids UUID[],
+    limit_count int
+)
+RETURNS int
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT count(*)::int FROM (
+        SELECT 1
+        FROM documents d
+        WHERE d.status = 'completed'
+        AND (filter_document_ids IS NULL OR d.id = ANY(filter_document_ids))
+        AND (
+            d.owner_id = user_uuid
+            OR EXISTS (
+                SELECT 1 FROM document_shares ds
+                WHERE ds.document_id = d.id
+                AND ds.shared_with_user_id = user_uuid
+            )
+        )
+        LIMIT limit_count
+    ) accessible;
+$$;
+
+-- Lets index scans keep walking past candidates that fail the access checks
+-- instead of stopping at ef_search / probes worth of rows (pgvector 0.8+)
+CREATE OR REPLACE FUNCTION enable_iterative_vector_scans()
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF (SELECT string_to_array(extversion, '.')::int[] >= ARRAY[0, 8] FROM pg_extension WHERE extname = 'vector') THEN
+        PERFORM set_config('hnsw.iterative_scan', 'relaxed_order', true);
+        PERFORM set_config('ivfflat.iterative_scan', 'relaxed_order', true);
+    END IF;
+END;
+$$;
+
+-- Only light columns are returned; text and embeddings never leave the database.
+-- Index scans filter their candidates by access afterwards, so a user who can
+-- see a small slice of the table could get too few rows from them. Small
+-- accessible sets (up to 2000 documents) are therefore scored exactly, larger
+-- ones use the indexes, and any index search that comes back with fewer than
+-- match_count documents is redone exactly. The threshold is applied to the k
+-- nearest documents afterwards. ef_search trades latency for recall for this
+-- call only; left NULL it is raised to the chunk over-fetch so the HNSW scan
+-- can return enough rows. probes only has an effect on an ivfflat index built
+-- with scripts/vector_index.py; the schema itself creates HNSW indexes.
+DROP FUNCTION IF EXISTS match_accessible_documents(vector, UUID, int, float, UUID[]);
+CREATE OR REPLACE FUNCTION match_accessible_documents(
+    query_embedding vector(384),
+    user_uuid UUID,
+    match_count int DEFAULT 10,
+    match_threshold float DEFAULT NULL,
+    filter_document_ids UUID[] DEFAULT NULL,
+    ef_search int DEFAULT NULL,
+    probes int DEFAULT NULL
+)
+RETURNS TABLE (
+    id UUID,
+    title VARCHAR(255),
+    description TEXT,
+    tags TEXT[],
+    created_at TIMESTAMP WITH TIME ZONE,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    chunk_count int := match_count * 5;
+    exact_scan_documents CONSTANT int := 2000;
+    accessible int;
+    match_ids UUID[];
+    match_scores float[];
+BEGIN
+    -- An HNSW scan returns at most ef_search rows; pgvector rejects values above 1000.
+    -- A caller's ef_search is kept as given: too few rows fall back to the exact scan.
+    PERFORM set_config(
+        'hnsw.ef_search',
+        LEAST(COALESCE(ef_search, GREATEST(COALESCE(NULLIF(current_setting('hnsw.ef_search', true), '')::int, 40), chunk_count)), 1000)::text,
+        true
+    );
+    IF probes IS NOT NULL THEN
+        PERFORM set_config('ivfflat.probes', probes::text, true);
+    END IF;
+    PERFORM enable_iterative_vector_scans();
+
+    accessible := count_accessible_documents(user_uuid, filter_document_ids, exact_scan_documents + 1);
+
+    IF accessible > exact_scan_documents THEN
+        SELECT array_agg(n.document_id ORDER BY n.similarity DESC), array_agg(n.similarity ORDER BY n.similarity DESC)
+        INTO match_ids, match_scores
+        FROM nearest_accessible_documents(query_embedding, user_uuid, match_count, chunk_count, filter_document_ids, false) n;
+    END IF;
+
+    IF accessible > 0 AND COALESCE(array_length(match_ids, 1), 0) < match_count THEN
+        SELECT array_agg(n.document_id ORDER BY n.similarity DESC), array_agg(n.similarity ORDER BY n.similarity DESC)
+        INTO match_ids, match_scores
+        FROM nearest_accessible_documents(query_embedding, user_uuid, match_count, chunk_count, filter_document_ids, true) n;
+    END IF;
+
+    RETURN QUERY
+    SELECT d.id, d.title, d.description, d.tags, d.created_at, m.similarity
+    FROM unnest(match_ids, match_scores) AS m(document_id, similarity)
+    JOIN documents d ON d.id = m.document_id
+    WHERE match_threshold IS NULL OR m.similarity >= match_threshold
+    ORDER BY m.similarity DESC
+    LIMIT match_count;
+END;
+$$;
+
+-- Nearest chunks with their anonymized text, for answering questions from the
+-- passages that matched rather than from the start of each document. Uses the
+-- same exact / index / exact-fallback strategy as match_accessible_documents.
+CREATE OR REPLACE FUNCTION match_accessible_chunks(
+    query_embedding vector(384),
+    user_uuid UUID,
+    match_count int DEFAULT 5,
+    match_threshold float DEFAULT NULL,
+    filter_document_ids UUID[] DEFAULT NULL,
+    ef_search int DEFAULT NULL,
+    probes int DEFAULT NULL
+)
+RETURNS TABLE (
+    document_id UUID,
+    title VARCHAR(255),
+    chunk_index int,
+    content TEXT,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+#variable_conflict use_column
+DECLARE
+    exact_scan_documents CONSTANT int := 2000;
+    accessible int;
+    match_ids UUID[];
+    match_scores float[];
+BEGIN
+    IF ef_search IS NOT NULL THEN
+        PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, match_count), 1000)::text, true);
+    END IF;
+    IF probes IS NOT NULL THEN
+        PERFORM set_config('ivfflat.probes', probes::text, true);
+    END IF;
+    PERFORM enable_iterative_vector_scans();
+
+    accessible := count_accessible_documents(user_uuid, filter_document_ids, exact_scan_documents + 1);
+
+    IF accessible > exact_scan_documents THEN
+        SELECT array_agg(n.chunk_id ORDER BY n.similarity DESC), array_agg(n.similarity ORDER BY n.similarity DESC)
+        INTO match_ids, match_scores
+        FROM nearest_accessible_chunks(query_embedding, user_uuid, match_count, filter_document_ids, false) n;
+    END IF;
+
+    IF accessible > 0 AND COALESCE(array_length(match_ids, 1), 0) < match_count THEN
+        SELECT array_agg(n.chunk_id ORDER BY n.similarity DESC), array_agg(n.similarity ORDER BY n.similarity DESC)
+        INTO match_ids, match_scores
+        FROM nearest_accessible_chunks(query_embedding, user_uuid, match_count, filter_document_ids, true) n;
+    END IF;
+
+    RETURN QUERY
+    SELECT c.document_id, d.title, c.chunk_index, c.content, m.similarity
+    FROM unnest(match_ids, match_scores) AS m(chunk_id, similarity)
+    JOIN document_chunks c ON c.id = m.chunk_id
+    JOIN documents d ON d.id = c.document_id
+    WHERE match_threshold IS NULL OR m.similarity >= match_threshold
+    ORDER BY m.similarity DESC;
+END;
+$$;
+
+-- Swap a document's chunks in one transaction, so readers see either the old
+-- set or the new one and a failed write leaves the old set in place.
+-- Embeddings may be JSON arrays or pgvector text.
+CREATE OR REPLACE FUNCTION replace_document_chunks(
+    target_document_id UUID,
+    chunks JSONB
+)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted int;
+BEGIN
+    DELETE FROM document_chunks WHERE document_id = target_document_id;
+
+    INSERT INTO document_chunks (document_id, chunk_index, content, start_pos, end_pos, embedding)
+    SELECT target_document_id, c.chunk_index, c.content, c.start_pos, c.end_pos, c.embedding::vector(384)
+    FROM jsonb_to_recordset(COALESCE(chunks, '[]'::jsonb))
+        AS c(chunk_index int, content text, start_pos int, end_pos int, embedding text);
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+
+    RETURN inserted;
+END;
+$$;
+
+-- Copy chunks between documents with identical content inside the database,
+-- e.g. for a deduplicated upload, replacing any the target already has
+CREATE OR REPLACE FUNCTION copy_document_chunks(
+    source_document_id UUID,
+    target_document_id UUID
+)
+RETURNS int
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    inserted int;
+BEGIN
+    DELETE FROM document_chunks WHERE document_id = target_document_id;
+
+    INSERT INTO document_chunks (document_id, chunk_index, content, start_pos, end_pos, embedding)
+    SELECT target_document_id, c.chunk_index, c.content, c.start_pos, c.end_pos, c.embedding
+    FROM document_chunks c
+    WHERE c.document_id = source_document_id;
+    GET DIAGNOSTICS inserted = ROW_COUNT;
+
+    RETURN inserted;
+END;
+$$;
+
 -- Create function to get accessible documents for a user
 CREATE OR REPLACE FUNCTION get_accessible_documents(user_uuid UUID)
 RETURNS TABLE (
@@ -159,6 +517,7 @@ $$;
 -- Create RLS (Row Level Security) policies
 ALTER TABLE users ENABLE ROW LEVEL SECURITY;
 ALTER TABLE documents ENABLE ROW LEVEL SECURITY;
+ALTER TABLE document_chunks ENABLE ROW LEVEL SECURITY;
 ALTER TABLE document_shares ENABLE ROW LEVEL SECURITY;
 ALTER TABLE audit_logs ENABLE ROW LEVEL SECURITY;
 ALTER TABLE document_processing_tasks ENABLE ROW LEVEL SECURITY;
@@ -187,6 +546,22 @@ CREATE POLICY "Users can insert document shares" ON document_shares FOR INSERT W
 CREATE POLICY "Users can update document shares they created" ON document_shares FOR UPDATE USING (created_by = auth.uid());
 CREATE POLICY "Users can delete document shares they created" ON document_shares FOR DELETE USING (created_by = auth.uid());
 
+-- Document chunks policies
+CREATE POLICY "Users can view chunks of accessible documents" ON document_chunks FOR SELECT USING (
+    EXISTS (
+        SELECT 1 FROM documents
+        WHERE documents.id = document_chunks.document_id
+        AND (
+            documents.owner_id = auth.uid()
+            OR EXISTS (
+                SELECT 1 FROM document_shares
+                WHERE document_shares.document_id = documents.id
+                AND document_shares.shared_with_user_id = auth.uid()
+            )
+        )
+    )
+);
+
 -- Audit logs policies
 CREATE POLICY "Users can view their own audit logs" ON audit_logs FOR SELECT USING (user_id = auth.uid());
 CREATE POLICY "System can insert audit logs" ON audit_logs FOR INSERT WITH CHECK (true);
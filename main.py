@@ -1,3 +1,7 @@
+import time
+
+_import_started = time.perf_counter()
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -6,6 +10,10 @@ from app.core.config import settings
 from app.api.auth.auth import router as auth_router
 from app.api.documents.documents import router as documents_router
 from app.api.search.search import router as search_router
+from app.services.model_registry import model_registry
+from app.services.status_service import status_service
+from app.services.search_index_service import search_index_cache
+from app.utils.process_memory import get_rss_bytes
 import logging
 from datetime import datetime
 import psycopg2
@@ -14,6 +22,7 @@ logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title=settings.app_name,
@@ -42,6 +51,31 @@ app.include_router(search_router)
 
 
 
+startup_report = {}
+
+
+@app.on_event("startup")
+async def load_api_models():
+    """Load only the models the API endpoints use and record what startup cost"""
+    import_seconds = time.perf_counter() - _import_started
+    started = time.perf_counter()
+    model_registry.preload_for_role("api")
+
+    startup_report.update({
+        "import_seconds": round(import_seconds, 3),
+        "model_load_seconds": round(time.perf_counter() - started, 3),
+        "rss_mb": round(get_rss_bytes() / (1024 * 1024), 1),
+        "models": model_registry.report()
+    })
+    logger.info(f"API startup report: {startup_report}")
+    await status_service.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await status_service.stop()
+
+
 @app.get("/")
 async def root():
     return {
@@ -62,41 +96,7 @@ async def health_check():
 
 @app.get("/status")
 async def status_check():
-    from app.services.document_processing_service import DocumentProcessingService
-    from app.utils.redis_client import get_redis_client
-
-    try:
-        processing_service = DocumentProcessingService()
-        services_status = processing_service.get_processing_services_status()
-        
-        # Check Redis connection
-        redis_client = get_redis_client()
-        redis_status = "connected" if redis_client.ping() else "disconnected"
-        
-        # Check Celery worker status (basic check)
-        try:
-            from app.celery_app import celery_app
-            inspect = celery_app.control.inspect()
-            active_workers = inspect.active()
-            worker_status = "running" if active_workers else "not running"
-        except Exception:
-            worker_status = "unknown"
-
-        return {
-            "status": "operational",
-            "timestamp": datetime.utcnow().isoformat(),
-            "version": settings.app_version,
-            "services": services_status,
-            "redis": redis_status,
-            "celery_worker": worker_status
-        }
-    except Exception as e:
-        return {
-            "status": "degraded",
-            "timestamp": datetime.utcnow().isoformat(),
-            "version": settings.app_version,
-            "error": str(e)
-        }
+    return {**status_service.get_status(), 'search_index': search_index_cache.get_stats()}
 
 
 @app.exception_handler(HTTPException)
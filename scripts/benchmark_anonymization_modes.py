@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark pattern-only anonymization against the full NER + pattern mode
+
+Reports load time and throughput for each mode, and how many of the full
+mode's structured identifiers (emails, phones, cards, ...) pattern mode finds.
+
+Usage: python scripts/benchmark_anonymization_modes.py [--docs 200] [--input dir_of_txt_files]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.anonymization_service import AnonymizationService
+
+# Entity types produced by spaCy NER rather than by pattern recognizers
+NER_ENTITY_TYPES = {"PERSON", "LOCATION", "NRP", "ORGANIZATION", "DATE_TIME"}
+
+TEMPLATES = [
+    "Invoice for {name}, {city}. Contact {email} or call {phone}.",
+    "Card {card} was charged on 2024-03-{day:02d}; refunds go to IBAN {iban}.",
+    "Login from {ip} flagged for review by {name}. SSN on file: {ssn}.",
+    "Meeting notes: the quarterly review ran long and covered hiring plans.",
+]
+NAMES = ["John Smith", "Maria Garcia", "Wei Chen", "Aisha Okafor"]
+CITIES = ["Seattle", "Berlin", "Toronto", "Madrid"]
+
+
+def synthetic_corpus(count: int, sentences: int = 20):
+    rng = random.Random(42)
+    docs = []
+    for _ in range(count):
+        docs.append(" ".join(
+            rng.choice(TEMPLATES).format(
+                name=rng.choice(NAMES),
+                city=rng.choice(CITIES),
+                email=f"user{rng.randint(1, 999)}@example.com",
+                phone=f"(212) 555-{rng.randint(1000, 9999)}",
+                card="4111 1111 1111 1111",
+                iban="DE89 3704 0044 0532 0130 00",
+                ip=f"192.168.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+                ssn=f"{rng.randint(100, 665)}-{rng.randint(10, 99)}-{rng.randint(1000, 9999)}",
+                day=rng.randint(1, 28),
+            )
+            for _ in range(sentences)
+        ))
+    return docs
+
+
+def load_corpus(input_dir: str):
+    docs = []
+    for name in sorted(os.listdir(input_dir)):
+        if name.endswith(".txt"):
+            with open(os.path.join(input_dir, name), encoding="utf-8") as f:
+                docs.append(f.read())
+    return docs
+
+
+def benchmark_mode(mode: str, docs):
+    started = time.perf_counter()
+    service = AnonymizationService(mode=mode)
+    load_seconds = time.perf_counter() - started
+
+    service._analyze_single(docs[0])
+
+    started = time.perf_counter()
+    spans = [
+        {(r.entity_type, r.start, r.end) for r in service._analyze(doc)}
+        for doc in docs
+    ]
+    elapsed = time.perf_counter() - started
+
+    return {
+        "load_s": load_seconds,
+        "docs_per_s": len(docs) / elapsed if elapsed else 0.0,
+        "ms_per_doc": 1000 * elapsed / len(docs),
+        "spans": spans,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=200, help="Synthetic documents to generate")
+    parser.add_argument("--input", help="Directory of .txt files to use instead of synthetic text")
+    args = parser.parse_args()
+
+    docs = load_corpus(args.input) if args.input else synthetic_corpus(args.docs)
+    print(f"📄 {len(docs)} documents, {sum(len(d) for d in docs)} characters")
+
+    results = {}
+    for mode in ("full", "pattern"):
+        results[mode] = benchmark_mode(mode, docs)
+        r = results[mode]
+        print(f"{mode:>8}: load {r['load_s']:6.2f}s  {r['ms_per_doc']:8.2f} ms/doc  {r['docs_per_s']:8.1f} docs/s")
+
+    structured = [
+        {span for span in doc_spans if span[0] not in NER_ENTITY_TYPES}
+        for doc_spans in results["full"]["spans"]
+    ]
+    expected = sum(len(doc_spans) for doc_spans in structured)
+    found = sum(len(doc_spans & pattern_spans)
+                for doc_spans, pattern_spans in zip(structured, results["pattern"]["spans"]))
+
+    speedup = results["full"]["ms_per_doc"] / results["pattern"]["ms_per_doc"]
+    print(f"🚀 pattern mode speedup: {speedup:.1f}x")
+    if expected:
+        print(f"🔍 structured identifiers matched: {found}/{expected} ({100 * found / expected:.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
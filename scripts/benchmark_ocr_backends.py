@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark the OCR backends (pytesseract subprocess vs persistent tesserocr handle)
+
+Usage: python scripts/benchmark_ocr_backends.py path/to/scanned.pdf [--pages 10] [--dpi 300]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+import pdf2image
+
+from app.services.ocr_engines import ENGINES, tesserocr
+from app.services.ocr_service import OCRService
+
+
+def benchmark_backend(backend: str, images, languages, repeat: int):
+    engine = ENGINES[backend](languages)
+
+    # Warm-up page so model loading is reported separately from steady state
+    started = time.perf_counter()
+    engine.recognize(images[0])
+    first_page = time.perf_counter() - started
+
+    started = time.perf_counter()
+    characters = 0
+    for _ in range(repeat):
+        for image in images:
+            characters += len(engine.recognize(image))
+    elapsed = time.perf_counter() - started
+    pages = len(images) * repeat
+
+    return {
+        "first_page_s": first_page,
+        "pages_per_s": pages / elapsed if elapsed else 0.0,
+        "ms_per_page": 1000 * elapsed / pages,
+        "characters": characters // repeat,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("pdf_path")
+    parser.add_argument("--pages", type=int, default=10, help="Number of pages to OCR")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the page set")
+    args = parser.parse_args()
+
+    ocr_service = OCRService()
+    rendered = pdf2image.convert_from_path(args.pdf_path, dpi=args.dpi, first_page=1, last_page=args.pages)
+    images = [
+        ocr_service._preprocess_image(cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR))
+        for image in rendered
+    ]
+    print(f"📄 {len(images)} pages at {args.dpi} DPI from {args.pdf_path}")
+
+    backends = ["pytesseract"]
+    if tesserocr is not None:
+        backends.append("tesserocr")
+    else:
+        print("⚠️  tesserocr is not installed, only pytesseract will be measured")
+
+    results = {}
+    for backend in backends:
+        results[backend] = benchmark_backend(backend, images, ocr_service.languages, args.repeat)
+        r = results[backend]
+        print(f"{backend:>12}: {r['ms_per_page']:8.1f} ms/page  {r['pages_per_s']:6.2f} pages/s  "
+              f"first page {r['first_page_s']:.2f}s  {r['characters']} chars")
+
+    if len(results) == 2:
+        speedup = results["pytesseract"]["ms_per_page"] / results["tesserocr"]["ms_per_page"]
+        print(f"🚀 tesserocr speedup: {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
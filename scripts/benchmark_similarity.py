@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark embedding decoding and top-k cosine scoring
+
+For each corpus size: decode time for pgvector text and binary embeddings,
+matrix build and normalization, and top-k query latency with one matmul plus
+argpartition. The old per-pair loop is timed on a sample and extrapolated.
+
+Usage: python scripts/benchmark_similarity.py [--sizes 10000,100000,1000000] [--dim 384] [--k 10]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.utils.vector_search import encode_embedding, embedding_matrix, normalize_rows, top_k_similar
+
+LOOP_SAMPLE = 2000
+DECODE_SAMPLE = 20000
+
+
+def per_pair_similarity(query, embedding_text):
+    """The previous approach: parse one stored vector and recompute both norms"""
+    vec2 = np.array([float(x) for x in embedding_text[1:-1].split(",")])
+    vec1 = np.array(query)
+    return float(np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2)))
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def benchmark_size(size: int, dim: int, k: int, queries: int, rng):
+    vectors = rng.standard_normal((size, dim), dtype=np.float32)
+    query_vectors = rng.standard_normal((queries, dim), dtype=np.float32)
+
+    # Decoding is linear in the row count, so it is measured on a sample
+    sample = vectors[:min(size, DECODE_SAMPLE)]
+    as_text = ["[" + ",".join(f"{x:.6f}" for x in row) + "]" for row in sample]
+    as_binary = [encode_embedding(row) for row in sample]
+    _, text_seconds = timed(embedding_matrix, as_text)
+    _, binary_seconds = timed(embedding_matrix, as_binary)
+    scale = size / len(sample)
+
+    matrix = np.ascontiguousarray(vectors)
+    _, normalize_seconds = timed(normalize_rows, matrix)
+
+    started = time.perf_counter()
+    for query in query_vectors:
+        top_k_similar(query, matrix, k)
+    query_ms = 1000 * (time.perf_counter() - started) / queries
+
+    loop_sample = as_text[:min(size, LOOP_SAMPLE)]
+    query = query_vectors[0].tolist()
+    started = time.perf_counter()
+    for embedding_text in loop_sample:
+        per_pair_similarity(query, embedding_text)
+    loop_ms = 1000 * (time.perf_counter() - started) * size / len(loop_sample)
+
+    return {
+        "decode_text_s": text_seconds * scale,
+        "decode_binary_s": binary_seconds * scale,
+        "normalize_s": normalize_seconds,
+        "query_ms": query_ms,
+        "loop_query_ms": loop_ms,
+        "matrix_mb": matrix.nbytes / (1024 * 1024),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    print(f"{'vectors':>10}{'matrix MB':>11}{'text dec s':>12}{'bin dec s':>11}"
+          f"{'norm s':>9}{'top-k ms':>10}{'loop ms':>11}{'speedup':>9}")
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        r = benchmark_size(size, args.dim, args.k, args.queries, rng)
+        print(f"{size:>10}{r['matrix_mb']:>11.1f}{r['decode_text_s']:>12.2f}{r['decode_binary_s']:>11.2f}"
+              f"{r['normalize_s']:>9.3f}{r['query_ms']:>10.2f}{r['loop_query_ms']:>11.0f}"
+              f"{r['loop_query_ms'] / r['query_ms']:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
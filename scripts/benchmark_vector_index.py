@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Recall-vs-latency report for HNSW and ivfflat on a synthetic corpus
+
+Loads clustered random vectors into a temporary table, computes exact top-k
+neighbours in numpy, then sweeps hnsw.ef_search and ivfflat.probes and reports
+recall@k with p50/p95 query latency for each setting.
+
+Usage: python scripts/benchmark_vector_index.py [--rows 100000] [--queries 200] [--k 10]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import psycopg2
+
+from app.core.config import settings
+from scripts.vector_index import auto_lists
+
+EF_SEARCH_VALUES = [10, 20, 40, 80, 160, 320]
+PROBE_VALUES = [1, 2, 5, 10, 20, 50]
+
+
+def synthetic_corpus(rows: int, dim: int, clusters: int, rng):
+    """Clustered vectors, so nearest neighbours are meaningful like real embeddings"""
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    labels = rng.integers(0, clusters, rows)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((rows, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def to_pgvector(vector) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in vector) + "]"
+
+
+def load_table(cur, vectors):
+    cur.execute(f"CREATE TEMP TABLE vector_bench (id int PRIMARY KEY, embedding vector({vectors.shape[1]}))")
+    buffer = io.StringIO()
+    for i, vector in enumerate(vectors):
+        buffer.write(f"{i}\t{to_pgvector(vector)}\n")
+    buffer.seek(0)
+    cur.copy_from(buffer, "vector_bench", columns=("id", "embedding"))
+    cur.execute("ANALYZE vector_bench")
+
+
+def exact_neighbours(vectors, queries, k: int):
+    scores = queries @ vectors.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return [set(row) for row in top]
+
+
+def sweep(cur, setting: str, values, queries, truth, k: int):
+    query_texts = [to_pgvector(q) for q in queries]
+    for value in values:
+        cur.execute(f"SET {setting} = {value}")
+        latencies, hits = [], 0
+        for query_text, expected in zip(query_texts, truth):
+            started = time.perf_counter()
+            cur.execute(
+                "SELECT id FROM vector_bench ORDER BY embedding <=> %s::vector LIMIT %s",
+                (query_text, k)
+            )
+            found = {row[0] for row in cur.fetchall()}
+            latencies.append(1000 * (time.perf_counter() - started))
+            hits += len(found & expected)
+        recall = hits / (k * len(truth))
+        print(f"  {setting}={value:<5} recall@{k} {recall:6.3f}   "
+              f"p50 {np.percentile(latencies, 50):7.2f} ms   p95 {np.percentile(latencies, 95):7.2f} ms")
+
+
+def build_index(cur, sql: str):
+    started = time.perf_counter()
+    cur.execute(sql)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=settings.vector_dimension)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--m", type=int, default=settings.vector_index_m)
+    parser.add_argument("--ef-construction", type=int, default=settings.vector_index_ef_construction)
+    parser.add_argument("--maintenance-work-mem", default="1GB")
+    args = parser.parse_args()
+
+    if not settings.database_url:
+        sys.exit("DATABASE_URL is not configured")
+
+    rng = np.random.default_rng(42)
+    vectors = synthetic_corpus(args.rows, args.dim, max(10, args.rows // 1000), rng)
+    queries = synthetic_corpus(args.queries, args.dim, max(10, args.rows // 1000), np.random.default_rng(7))
+    truth = exact_neighbours(vectors, queries, args.k)
+
+    conn = psycopg2.connect(settings.database_url)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+            started = time.perf_counter()
+            load_table(cur, vectors)
+            print(f"📄 Loaded {args.rows} x {args.dim} vectors in {time.perf_counter() - started:.1f}s")
+
+            seconds = build_index(
+                cur,
+                f"CREATE INDEX bench_hnsw ON vector_bench USING hnsw (embedding vector_cosine_ops) "
+                f"WITH (m = {args.m}, ef_construction = {args.ef_construction})"
+            )
+            print(f"\n🔷 HNSW m={args.m} ef_construction={args.ef_construction} (built in {seconds:.1f}s)")
+            sweep(cur, "hnsw.ef_search", EF_SEARCH_VALUES, queries, truth, args.k)
+            cur.execute("DROP INDEX bench_hnsw")
+
+            lists = auto_lists(args.rows)
+            seconds = build_index(
+                cur,
+                f"CREATE INDEX bench_ivfflat ON vector_bench USING ivfflat (embedding vector_cosine_ops) "
+                f"WITH (lists = {lists})"
+            )
+            print(f"\n🔶 ivfflat lists={lists} (built in {seconds:.1f}s)")
+            sweep(cur, "ivfflat.probes", [p for p in PROBE_VALUES if p <= lists], queries, truth, args.k)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
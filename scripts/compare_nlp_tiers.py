@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Compare Presidio NLP model tiers on load time, memory, throughput and recall
+
+Each tier is measured in a fresh interpreter configured through the same
+PRESIDIO_NLP_ENGINE / PRESIDIO_NLP_MODEL settings a deployment would use, so
+RSS reflects that tier alone. Recall is measured against the labelled fixture
+corpus in scripts/fixtures/pii_corpus.jsonl.
+
+Usage: python scripts/compare_nlp_tiers.py [--tiers spacy-sm,spacy-lg] [--repeat 20]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+DEFAULT_CORPUS = os.path.join(PROJECT_ROOT, "scripts", "fixtures", "pii_corpus.jsonl")
+
+NLP_MODEL_TIERS = {
+    "spacy-sm": ("spacy", "en_core_web_sm"),
+    "spacy-md": ("spacy", "en_core_web_md"),
+    "spacy-lg": ("spacy", "en_core_web_lg"),
+    "transformers": ("transformers", "dslim/bert-base-NER"),
+}
+
+
+def load_corpus(path: str):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def count_matches(corpus, predictions):
+    """Per entity type: gold entities, and those overlapped by a prediction of the same type."""
+    found, total = {}, {}
+    for doc, predicted in zip(corpus, predictions):
+        for gold in doc["entities"]:
+            entity_type = gold["entity_type"]
+            total[entity_type] = total.get(entity_type, 0) + 1
+            if any(p[0] == entity_type and p[1] < gold["end"] and gold["start"] < p[2] for p in predicted):
+                found[entity_type] = found.get(entity_type, 0) + 1
+    return found, total
+
+
+def measure_tier(corpus_path: str, repeat: int) -> dict:
+    """Runs inside the child interpreter"""
+    from app.utils.process_memory import get_rss_bytes
+
+    corpus = load_corpus(corpus_path)
+    rss_before = get_rss_bytes()
+
+    started = time.perf_counter()
+    from app.services.anonymization_service import AnonymizationService
+    service = AnonymizationService()
+    load_seconds = time.perf_counter() - started
+
+    predictions = [
+        [(r.entity_type, r.start, r.end) for r in service._analyze_single(doc["text"])]
+        for doc in corpus
+    ]
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for doc in corpus:
+            service._analyze_single(doc["text"])
+    elapsed = time.perf_counter() - started
+
+    found, total = count_matches(corpus, predictions)
+    gold = sum(total.values())
+
+    return {
+        "load_seconds": round(load_seconds, 2),
+        "rss_mb": round(get_rss_bytes() / (1024 * 1024), 1),
+        "model_rss_mb": round((get_rss_bytes() - rss_before) / (1024 * 1024), 1),
+        "docs_per_second": round(len(corpus) * repeat / elapsed, 1) if elapsed else 0.0,
+        "recall": round(sum(found.values()) / gold, 3) if gold else 0.0,
+        "recall_by_type": {
+            entity_type: round(found.get(entity_type, 0) / count, 3)
+            for entity_type, count in sorted(total.items())
+        },
+    }
+
+
+def run_in_child(tier: str, corpus_path: str, repeat: int) -> dict:
+    engine, model = NLP_MODEL_TIERS[tier]
+    env = dict(os.environ, PRESIDIO_NLP_ENGINE=engine, PRESIDIO_NLP_MODEL=model)
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", "--corpus", corpus_path, "--repeat", str(repeat)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        return {"error": (completed.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tiers", default=",".join(NLP_MODEL_TIERS),
+                        help=f"Comma-separated tiers from: {', '.join(NLP_MODEL_TIERS)}")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL of {text, entities}")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the corpus for throughput")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_tier(args.corpus, args.repeat)))
+        return
+
+    tiers = [tier.strip() for tier in args.tiers.split(",") if tier.strip()]
+    unknown = [tier for tier in tiers if tier not in NLP_MODEL_TIERS]
+    if unknown:
+        parser.error(f"Unknown tiers: {', '.join(unknown)}")
+
+    print(f"{'tier':<14}{'load s':>8}{'RSS MB':>9}{'model MB':>10}{'docs/s':>9}{'recall':>8}")
+    for tier in tiers:
+        report = run_in_child(tier, args.corpus, args.repeat)
+        if "error" in report:
+            print(f"{tier:<14}  ⚠️  {report['error']}")
+            continue
+        print(f"{tier:<14}{report['load_seconds']:>8}{report['rss_mb']:>9}{report['model_rss_mb']:>10}"
+              f"{report['docs_per_second']:>9}{report['recall']:>8}")
+        print(f"{'':<14}  " + ", ".join(f"{t} {r}" for t, r in report["recall_by_type"].items()))
+
+
+if __name__ == "__main__":
+    main()
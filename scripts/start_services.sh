@@ -23,7 +23,8 @@ fi
 
 # Start Celery worker in background
 echo "Starting Celery worker..."
-celery -A app.celery_app worker --loglevel=info --concurrency=2 --daemon
+# Concurrency comes from WORKER_CONCURRENCY, which also sizes each child's OCR pool
+celery -A app.celery_app worker --loglevel=info --daemon
 
 # Start Celery beat for scheduled tasks (optional)
 echo "Starting Celery beat for scheduled tasks..."
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Compare process startup cost for the API role and the Celery worker role
+
+Each role is measured in a fresh interpreter: time to import the entry module,
+time to load that role's models, and the resulting RSS.
+
+Usage: python scripts/startup_report.py [--role api|worker]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+ENTRY_MODULES = {
+    "api": "main",
+    "worker": "app.celery_app",
+}
+
+
+def measure_role(role: str) -> dict:
+    """Runs inside the child interpreter"""
+    import importlib
+
+    started = time.perf_counter()
+    importlib.import_module(ENTRY_MODULES[role])
+    import_seconds = time.perf_counter() - started
+
+    from app.services.model_registry import model_registry
+    from app.utils.process_memory import get_rss_bytes
+
+    started = time.perf_counter()
+    model_registry.preload_for_role(role)
+    load_seconds = time.perf_counter() - started
+
+    return {
+        "role": role,
+        "import_seconds": round(import_seconds, 2),
+        "model_load_seconds": round(load_seconds, 2),
+        "rss_mb": round(get_rss_bytes() / (1024 * 1024), 1),
+        "models": model_registry.report(),
+    }
+
+
+def run_in_child(role: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--role", role, "--json"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--role", choices=sorted(ENTRY_MODULES))
+    parser.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.json:
+        print(json.dumps(measure_role(args.role)))
+        return
+
+    roles = [args.role] if args.role else ["api", "worker"]
+    print(f"{'role':<8}{'import s':>10}{'models s':>10}{'RSS MB':>10}  models")
+    for role in roles:
+        report = run_in_child(role)
+        loaded = ", ".join(
+            f"{name} ({stats['load_seconds']}s, +{stats['rss_delta_mb']} MB)"
+            for name, stats in report["models"].items() if stats.get("loaded")
+        )
+        print(f"{role:<8}{report['import_seconds']:>10}{report['model_load_seconds']:>10}"
+              f"{report['rss_mb']:>10}  {loaded or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Inspect, rebuild or re-tune the vector index on documents or document_chunks
+
+  status   list vector indexes, their parameters and size
+  rebuild  build a new HNSW or ivfflat index concurrently, then swap it in
+  reindex  rebuild existing vector indexes in place (re-trains ivfflat lists)
+
+Usage:
+  python scripts/vector_index.py status
+  python scripts/vector_index.py --table chunks rebuild --type hnsw
+  python scripts/vector_index.py rebuild --type hnsw --m 16 --ef-construction 64
+  python scripts/vector_index.py rebuild --type ivfflat --lists auto
+  python scripts/vector_index.py reindex
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg2
+
+from app.core.config import settings
+
+INDEX_TYPES = ("hnsw", "ivfflat")
+
+# --table choice: (table, vector column, index name prefix)
+TABLES = {
+    "documents": ("documents", "vector_embedding", "idx_documents_vector_embedding"),
+    "chunks": ("document_chunks", "embedding", "idx_document_chunks_embedding"),
+}
+
+
+def connect():
+    if not settings.database_url:
+        sys.exit("DATABASE_URL is not configured")
+    conn = psycopg2.connect(settings.database_url)
+    # CREATE/DROP/REINDEX ... CONCURRENTLY cannot run inside a transaction
+    conn.autocommit = True
+    return conn
+
+
+def vector_indexes(cur, args):
+    table, column, _ = TABLES[args.table]
+    cur.execute("""
+        SELECT indexname, indexdef, pg_relation_size(format('%%I', indexname)::regclass)
+        FROM pg_indexes
+        WHERE tablename = %s AND (indexdef ILIKE '%%USING hnsw%%' OR indexdef ILIKE '%%USING ivfflat%%')
+        AND indexdef ILIKE %s
+        ORDER BY indexname
+    """, (table, f"%({column} %"))
+    return cur.fetchall()
+
+
+def embedded_rows(cur, args) -> int:
+    table, column, _ = TABLES[args.table]
+    cur.execute(f"SELECT count(*) FROM {table} WHERE {column} IS NOT NULL")
+    return cur.fetchone()[0]
+
+
+def auto_lists(rows: int) -> int:
+    """pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) beyond."""
+    if rows <= 1_000_000:
+        return max(10, rows // 1000)
+    return int(math.sqrt(rows))
+
+
+def status(cur, args):
+    print(f"📊 {embedded_rows(cur, args)} {args.table} with embeddings")
+    indexes = vector_indexes(cur, args)
+    if not indexes:
+        print("⚠️  No vector index: searches scan every row")
+    for name, definition, size in indexes:
+        print(f"  {name}  {size / (1024 * 1024):.1f} MB\n    {definition}")
+
+
+def rebuild(cur, args):
+    table, column, prefix = TABLES[args.table]
+    rows = embedded_rows(cur, args)
+    if args.type == "hnsw":
+        options = f"m = {args.m}, ef_construction = {args.ef_construction}"
+    else:
+        lists = auto_lists(rows) if args.lists == "auto" else int(args.lists)
+        options = f"lists = {lists}"
+
+    final_name = f"{prefix}_{args.type}"
+    build_name = f"{final_name}_build"
+    existing = [name for name, _, _ in vector_indexes(cur, args) if name != build_name]
+
+    cur.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+    cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {build_name}")
+    print(f"🔨 Building {args.type} index ({options}) over {rows} rows...")
+    started = time.perf_counter()
+    cur.execute(
+        f"CREATE INDEX CONCURRENTLY {build_name} ON {table} "
+        f"USING {args.type} ({column} vector_cosine_ops) WITH ({options})"
+    )
+    print(f"✅ Built in {time.perf_counter() - started:.1f}s")
+
+    for name in existing:
+        cur.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        print(f"🗑️  Dropped {name}")
+    cur.execute(f"ALTER INDEX {build_name} RENAME TO {final_name}")
+    print(f"🔁 {final_name} is now the active vector index")
+
+
+def reindex(cur, args):
+    cur.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+    for name, _, _ in vector_indexes(cur, args):
+        started = time.perf_counter()
+        cur.execute(f"REINDEX INDEX CONCURRENTLY {name}")
+        print(f"✅ Reindexed {name} in {time.perf_counter() - started:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--maintenance-work-mem", default="1GB",
+                        help="Memory for the build; HNSW builds are much faster when the graph fits")
+    parser.add_argument("--table", choices=sorted(TABLES), default="documents")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("status")
+
+    rebuild_parser = commands.add_parser("rebuild")
+    rebuild_parser.add_argument("--type", choices=INDEX_TYPES, default="hnsw")
+    rebuild_parser.add_argument("--m", type=int, default=settings.vector_index_m)
+    rebuild_parser.add_argument("--ef-construction", type=int, default=settings.vector_index_ef_construction)
+    rebuild_parser.add_argument("--lists", default="auto", help="ivfflat list count or 'auto'")
+
+    commands.add_parser("reindex")
+
+    args = parser.parse_args()
+    conn = connect()
+    try:
+        with conn.cursor() as cur:
+            {"status": status, "rebuild": rebuild, "reindex": reindex}[args.command](cur, args)
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -40,7 +40,7 @@ def start_worker():
     celery_app.worker_main([
         'worker',
         '--loglevel=info',
-        '--concurrency=2',  # Number of worker processes
+        f'--concurrency={settings.worker_concurrency}',  # Number of worker processes
         '--queues=default',  # Queue name
         '--hostname=worker1@%h'  # Worker hostname
     ])
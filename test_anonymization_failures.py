@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Test script to verify failed anonymization never overwrites a document or its chunks
+"""
+
+import pytest
+
+pytest.importorskip("celery")
+
+
+@pytest.fixture
+def tasks():
+    try:
+        import app.celery_app as celery_module
+    except Exception as e:
+        pytest.skip(f"Celery app unavailable: {e}")
+    return celery_module
+
+
+class FakeQuery:
+    def __init__(self, supabase, table):
+        self.supabase = supabase
+        self.table = table
+        self.payload = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def in_(self, *args, **kwargs):
+        return self
+
+    def update(self, payload):
+        self.payload = payload
+        return self
+
+    def eq(self, column, value):
+        if self.payload is not None:
+            self.supabase.updates.append((self.table, value, self.payload))
+        return self
+
+    def execute(self):
+        return type("Response", (), {"data": self.supabase.rows.get(self.table, [])})()
+
+
+class FakeSupabase:
+    def __init__(self, rows=None):
+        self.rows = rows or {}
+        self.updates = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def failing_analyze(text):
+    """Stand-in for AnalyzerEngine.analyze that breaks on one document"""
+    if "unparseable" in text:
+        raise RuntimeError("analyzer crashed")
+    return [{"entity_type": "PERSON", "start": 0, "end": 4}]
+
+
+class FakeAnonymizationService:
+    """Mirrors AnonymizationService: a text whose analysis raises comes back
+    unredacted with analyzer_version None, like its _empty_result"""
+    mode = "standard"
+
+    def analyze_and_anonymize(self, text):
+        try:
+            entities = failing_analyze(text)
+            return {
+                "anonymized_text": "<PERSON>" + text[4:],
+                "entities_found": len(entities),
+                "pii_entities": entities,
+                "pii_spans": entities,
+                "pii_summary": {"PERSON": len(entities)},
+                "is_sensitive": False,
+                "analyzer_version": "test-1"
+            }
+        except Exception:
+            return {
+                "anonymized_text": text,
+                "entities_found": 0,
+                "pii_entities": [],
+                "pii_spans": [],
+                "pii_summary": {},
+                "is_sensitive": False,
+                "analyzer_version": None
+            }
+
+    def anonymize_batch(self, texts, batch_size=None, n_process=None):
+        return [self.analyze_and_anonymize(text) for text in texts]
+
+
+class FakeEmbeddingService:
+    def __init__(self):
+        self.embedded = []
+
+    def create_embedding(self, text):
+        self.embedded.append(text)
+        return [0.0]
+
+    def create_chunk_embeddings(self, text):
+        self.embedded.append(text)
+        return [{"chunk_id": 0, "text": text, "start_pos": 0, "end_pos": len(text), "embedding": [0.0]}]
+
+
+class FakeTaggingService:
+    def suggest_tags(self, text):
+        return []
+
+
+def fake_processing_service(tasks, extracted_text=""):
+    """DocumentProcessingService with its models and extraction swapped for fakes"""
+    from app.models.document import DocumentType
+
+    class FakeProcessingService(tasks.DocumentProcessingService):
+        embedding_service = FakeEmbeddingService()
+        tagging_service = FakeTaggingService()
+
+        def __init__(self):
+            pass
+
+        def get_anonymization_service(self, mode=None):
+            return FakeAnonymizationService()
+
+        def _extract_document(self, file_path, ocr_profile=None):
+            return extracted_text, DocumentType.PDF, []
+
+    return FakeProcessingService()
+
+
+def patch_writes(monkeypatch, tasks, supabase, processing_service):
+    chunk_writes = []
+    monkeypatch.setattr(tasks.db_manager, "get_supabase", lambda: supabase)
+    monkeypatch.setattr(tasks, "get_processing_service", lambda: processing_service)
+    monkeypatch.setattr(tasks, "invalidate_document_search_indexes", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        tasks, "replace_document_chunks",
+        lambda client, document_id, chunks: chunk_writes.append((document_id, chunks))
+    )
+    return chunk_writes
+
+
+def test_batch_skips_document_whose_analysis_failed(monkeypatch, tasks):
+    """A document the analyzer raises on keeps its chunks and stored anonymized text"""
+    supabase = FakeSupabase({"documents": [
+        {"id": "doc-ok", "extracted_text": "John called", "metadata": {}},
+        {"id": "doc-bad", "extracted_text": "Jane sent an unparseable scan", "metadata": {}},
+    ]})
+    chunk_writes = patch_writes(monkeypatch, tasks, supabase, fake_processing_service(tasks))
+
+    result = tasks.anonymize_batch_task.run(["doc-ok", "doc-bad"])
+
+    assert result["status"] == "completed"
+    assert result["documents_processed"] == 1
+    assert result["documents_failed"] == 1
+    assert [document_id for document_id, _ in chunk_writes] == ["doc-ok"]
+    assert [document_id for _, document_id, _ in supabase.updates] == ["doc-ok"]
+    assert supabase.updates[0][2]["anonymized_text"] == "<PERSON> called"
+    print("✅ Failed document left untouched, the rest of the batch saved")
+
+
+def test_text_task_keeps_document_when_analysis_fails(monkeypatch, tasks):
+    """A failed single-text anonymization writes neither chunks nor the document row"""
+    supabase = FakeSupabase()
+    processing_service = fake_processing_service(tasks)
+    chunk_writes = patch_writes(monkeypatch, tasks, supabase, processing_service)
+
+    result = tasks.anonymize_text_task.run("Jane sent an unparseable scan", "doc-bad")
+
+    assert result["status"] == "failed"
+    assert chunk_writes == []
+    assert supabase.updates == []
+    assert processing_service.embedding_service.embedded == []
+    print("✅ Failed text anonymization left the document untouched")
+
+
+def test_processing_fails_before_embedding_unredacted_text(monkeypatch, tasks):
+    """A document whose analysis fails is marked failed and gets no chunks"""
+    supabase = FakeSupabase()
+    processing_service = fake_processing_service(tasks, "Jane sent an unparseable scan")
+    chunk_writes = patch_writes(monkeypatch, tasks, supabase, processing_service)
+    monkeypatch.setattr(tasks.process_document_task, "update_state", lambda *args, **kwargs: None)
+
+    result = tasks.process_document_task.run("scan.pdf", "doc-bad")
+
+    assert result["status"] == "failed"
+    assert chunk_writes == []
+    assert processing_service.embedding_service.embedded == []
+    assert [payload["status"] for _, _, payload in supabase.updates] == ["failed"]
+    assert all("anonymized_text" not in payload for _, _, payload in supabase.updates)
+    print("✅ Failed analysis marked the document failed without chunks")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test script to verify chunked PII analysis matches one-shot analysis
+"""
+
+import re
+import pytest
+from app.utils.text_chunks import split_text_with_overlap, merge_chunk_entities
+
+# A bare "John" only matches when a chunk boundary cuts "John Smith" short, the
+# way NER reports a truncated name at the edge of a chunk
+ENTITY_PATTERN = re.compile(r"John Smith|John\b|[\w.]+@[\w.]+\.com|\d{3}-\d{2}-\d{4}")
+
+
+def fake_analyze(text):
+    """Stand-in for AnalyzerEngine.analyze with deterministic regex entities"""
+    return [
+        {"entity_type": "PII", "start": m.start(), "end": m.end(), "score": 0.85}
+        for m in ENTITY_PATTERN.finditer(text)
+    ]
+
+
+def analyze_in_chunks(text, chunk_size, overlap):
+    chunks = split_text_with_overlap(text, chunk_size, overlap)
+    return chunks, merge_chunk_entities(chunks, [fake_analyze(chunk) for _, chunk in chunks])
+
+
+def test_chunks_cover_text():
+    """Chunks start at 0, end at len(text) and always overlap their neighbour"""
+    text = "Paragraph one. " * 200 + "\n\n" + "Sentence two! " * 200
+
+    chunks = split_text_with_overlap(text, chunk_size=500, overlap=80)
+
+    assert len(chunks) > 1
+    assert chunks[0][0] == 0
+    assert chunks[-1][0] + len(chunks[-1][1]) == len(text)
+    for (offset, chunk), (next_offset, _) in zip(chunks, chunks[1:]):
+        assert text[offset:offset + len(chunk)] == chunk
+        assert offset < next_offset <= offset + len(chunk)
+    print(f"✅ {len(chunks)} chunks cover the text")
+
+
+def test_short_text_is_single_chunk():
+    assert split_text_with_overlap("short text", chunk_size=500, overlap=80) == [(0, "short text")]
+    print("✅ Short text is analyzed in one piece")
+
+
+def test_entities_straddling_chunk_boundaries():
+    """Entities crossing a chunk boundary are reported once with their full span"""
+    # No sentence or paragraph breaks, so chunks are cut on whitespace, including
+    # the space inside "John Smith"
+    text = " ".join(f"item{i} noted by John Smith" for i in range(600))
+
+    chunks, merged = analyze_in_chunks(text, chunk_size=400, overlap=120)
+    expected = fake_analyze(text)
+
+    boundaries = [offset + len(chunk) for offset, chunk in chunks[:-1]]
+    straddling = [e for e in expected if any(e["start"] < b < e["end"] for b in boundaries)]
+    print(f"🔍 {len(straddling)} of {len(expected)} entities straddle a chunk boundary")
+
+    assert straddling
+    assert merged == expected
+    print("✅ Straddling entities are merged without truncation or duplicates")
+
+
+def test_chunked_matches_one_shot():
+    """Chunked analysis returns exactly what one-shot analysis returns"""
+    sentences = [
+        "Contact John Smith at john.smith@example.com.",
+        "His SSN is 123-45-6789 and nothing else.",
+        "The meeting ran long.\n\n",
+        "Escalate to jane.doe@corp.com if needed. ",
+    ]
+    text = " ".join(sentences[i % len(sentences)] for i in range(400))
+
+    for chunk_size, overlap in [(1000, 200), (2500, 300), (5000, 500)]:
+        _, merged = analyze_in_chunks(text, chunk_size, overlap)
+        assert merged == fake_analyze(text), (chunk_size, overlap)
+    print("✅ Chunked analysis matches one-shot analysis")
+
+
+class StubAnalyzer:
+    """Stand-in for Presidio's AnalyzerEngine, returning the regex entities"""
+
+    def analyze(self, text, entities, language):
+        from presidio_analyzer import RecognizerResult
+        return [
+            RecognizerResult(e["entity_type"], e["start"], e["end"], e["score"])
+            for e in fake_analyze(text)
+        ]
+
+
+def test_service_chunked_analysis_matches_one_shot():
+    """AnonymizationService._analyze_chunked maps and merges chunk results back onto the full text"""
+    module = pytest.importorskip("app.services.anonymization_service")
+
+    service = module.AnonymizationService.__new__(module.AnonymizationService)
+    service.mode = "full"
+    service.language = "en"
+    service.analyzer = StubAnalyzer()
+    service.chunk_size = 400
+    service.chunk_overlap = 120
+    service.analysis_workers = 1
+
+    text = " ".join(f"item{i} noted by John Smith, SSN 123-45-6789" for i in range(300))
+    results = service._analyze_chunked(text)
+
+    assert [
+        {"entity_type": r.entity_type, "start": r.start, "end": r.end, "score": r.score}
+        for r in results
+    ] == fake_analyze(text)
+    print("✅ Service chunked analysis matches one-shot analysis")
+
+
+if __name__ == "__main__":
+    test_chunks_cover_text()
+    test_short_text_is_single_chunk()
+    test_entities_straddling_chunk_boundaries()
+    test_chunked_matches_one_shot()
+    test_service_chunked_analysis_matches_one_shot()
+    print("\n🎉 All tests passed!")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script to verify embedding decoding and top-k cosine scoring
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from app.utils.vector_search import (
+    ExactVectorIndex, decode_embedding, embedding_matrix, encode_embedding, normalize_rows, top_k_similar
+)
+
+
+def brute_force(query, vectors, k=None, threshold=None):
+    """Reference ranking: cosine of the query against every vector, sorted descending"""
+    scores = [
+        float(np.dot(query, v) / (np.linalg.norm(query) * np.linalg.norm(v)))
+        for v in vectors
+    ]
+    order = sorted(range(len(vectors)), key=lambda i: -scores[i])
+    if k is not None:
+        order = order[:k]
+    if threshold is not None:
+        order = [i for i in order if scores[i] >= threshold]
+    return order, [scores[i] for i in order]
+
+
+def test_binary_round_trip():
+    """pgvector binary encoding decodes to the same float32 values"""
+    vector = np.random.default_rng(1).standard_normal(384).astype(np.float32)
+
+    data = encode_embedding(vector)
+
+    assert len(data) == 4 + 4 * 384
+    assert np.array_equal(decode_embedding(data), vector)
+    assert decode_embedding(memoryview(data)).dtype == np.float32
+    assert decode_embedding(data[:-4]) is None
+    print("✅ Binary embeddings round-trip")
+
+
+def test_text_and_list_decoding():
+    """pgvector text and plain lists decode; malformed input returns None"""
+    assert np.allclose(decode_embedding("[0.5,-1,2e-3]"), [0.5, -1.0, 0.002])
+    assert np.allclose(decode_embedding(" [1, 2, 3] "), [1.0, 2.0, 3.0])
+    assert np.allclose(decode_embedding([1, 2, 3]), [1.0, 2.0, 3.0])
+    for bad in (None, "", "[]", "1,2,3", "[1,two,3]", "__import__('os')", [], [[1, 2], [3, 4]]):
+        assert decode_embedding(bad) is None, bad
+    print("✅ Text and list embeddings decode, malformed ones are rejected")
+
+
+def test_dimension_mismatch():
+    """Rows and queries of the wrong dimension are skipped rather than scored"""
+    matrix, positions = embedding_matrix([[1, 0, 0], [1, 0], None, "[0,1,0]", "bad"], dimension=3)
+    assert matrix.shape == (2, 3)
+    assert positions == [0, 3]
+
+    index = ExactVectorIndex(["a", "b", "c"], [[1, 0, 0], [0, 1], [0, 0, 1]], dimension=3)
+    assert index.ids == ["a", "c"]
+    assert index.search([1, 0], k=5) == []
+    print("✅ Dimension mismatches are skipped")
+
+
+def test_top_k_matches_brute_force():
+    """One matmul plus argpartition ranks exactly like a per-pair cosine loop"""
+    rng = np.random.default_rng(42)
+    vectors = rng.standard_normal((500, 32)).astype(np.float32)
+    query = rng.standard_normal(32).astype(np.float32)
+
+    normalized = normalize_rows(vectors.copy())
+    for k in (1, 10, 100):
+        indices, scores = top_k_similar(query, normalized, k)
+        expected_order, expected_scores = brute_force(query, vectors, k)
+        assert list(indices) == expected_order
+        assert np.allclose(scores, expected_scores, atol=1e-5)
+    print("✅ Top-k matches a brute-force sort")
+
+
+def test_threshold_cut():
+    """Only scores at or above the threshold are returned, still in descending order"""
+    rng = np.random.default_rng(7)
+    vectors = rng.standard_normal((200, 16)).astype(np.float32)
+    query = rng.standard_normal(16).astype(np.float32)
+
+    index = ExactVectorIndex(list(range(200)), vectors)
+    results = index.search(query, k=50, threshold=0.2)
+    expected_order, _ = brute_force(query, vectors, k=50, threshold=0.2)
+
+    assert [i for i, _ in results] == expected_order
+    assert all(score >= 0.2 for _, score in results)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+    print("✅ Threshold cuts low scores")
+
+
+def test_k_larger_than_corpus():
+    """Asking for more results than vectors returns every vector, ranked"""
+    vectors = [[1, 0], [0, 1], [1, 1], [-1, 0]]
+    index = ExactVectorIndex(["a", "b", "c", "d"], vectors)
+
+    results = index.search([1, 0.1], k=10)
+
+    assert [i for i, _ in results] == ["a", "c", "b", "d"]
+    assert len(index.search([1, 0.1])) == 4
+    assert index.search([0, 0], k=10) == []
+    assert ExactVectorIndex([], []).search([1, 0], k=3) == []
+    print("✅ k larger than the corpus returns everything")
+
+
+if __name__ == "__main__":
+    test_binary_round_trip()
+    test_text_and_list_decoding()
+    test_dimension_mismatch()
+    test_top_k_matches_brute_force()
+    test_threshold_cut()
+    test_k_larger_than_corpus()
+    print("\n🎉 All tests passed!")